@@ -1,15 +1,34 @@
 import pygame
+import collections
 import math
 import random
+import sys
+import threading
+import time
+import wave
+import numpy as np
 from pygame import gfxdraw
+from particleEngine import (
+    Age,
+    Emitter,
+    Expand,
+    FadeOut,
+    FadeStep,
+    ParticleSystem,
+    RingRenderer,
+    SeekTarget,
+    SpriteRenderer,
+    circle_style,
+    matte_sprite,
+)
+import profiler
+from textCache import get_font, render_text
 
 # Initialize pygame
 pygame.init()
 
 # Window setup
 WIDTH, HEIGHT = 500, 500
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Futuristic AI Voice Interface")
 
 # Colors
 DARK_BG = (10, 15, 25)
@@ -19,82 +38,167 @@ WHITE = (255, 255, 255)
 GRAY = (100, 100, 100)
 
 
-# Particles class for the voice visualization
-class Particle:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.size = random.uniform(1, 3)
-        self.speed = random.uniform(0.5, 2)
-        self.life = random.uniform(50, 100)
-        self.max_life = self.life
-        self.angle = random.uniform(0, math.pi * 2)
-        self.distance = random.uniform(50, 150)
-        self.target_x = x + math.cos(self.angle) * self.distance
-        self.target_y = y + math.sin(self.angle) * self.distance
-
-    def update(self, activated):
-        if activated:
-            self.life -= 1
-            progress = 1 - (self.life / self.max_life)
-            self.x = self.x + (self.target_x - self.x) * self.speed * 0.01
-            self.y = self.y + (self.target_y - self.y) * self.speed * 0.01
-
-    def draw(self, surface, activated):
-        alpha = int(255 * (self.life / self.max_life)) if activated else 50
-        color = GLOW_COLOR if activated else GLOW_COLOR_DIM
-        surf = pygame.Surface((int(self.size * 4), int(self.size * 4)), pygame.SRCALPHA)
-        pygame.draw.circle(
-            surf,
-            (*color, alpha),
-            (int(self.size * 2), int(self.size * 2)),
-            int(self.size),
+# Particles and waves live in particleEngine systems rather than one object each
+PARTICLE_BURST = 20  # Particles emitted when the microphone activates
+ALPHA_LEVELS = 16  # Fade steps per particle sprite
+PARTICLE_SPRITES = SpriteRenderer(
+    [GLOW_COLOR, GLOW_COLOR_DIM], circle_style, ALPHA_LEVELS, max_radius=3
+)
+WAVE_RINGS = RingRenderer(GLOW_COLOR)
+
+
+# Audio analysis: WAV blocks -> windowed FFT -> normalized band energies
+AUDIO_BLOCK = 2048  # Frames per FFT block
+AUDIO_LOOKAHEAD = 0.2  # Seconds of spectra decoded ahead of playback
+AUDIO_SPAWN_RATE = 40  # Particles per frame at full bass energy
+AUDIO_WAVE_CHANCE = 0.3  # Wave spawn chance per frame at full mid energy
+BASS_BAND = (20, 250)  # Hz
+MID_BAND = (250, 4000)
+LINE_COUNT = 12
+
+
+def decode_frames(raw, sample_width, channels):
+    # PCM bytes -> mono float samples in [-1, 1]
+    if sample_width == 1:
+        samples = np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128
+    elif sample_width == 3:
+        packed = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = packed[:, 0] | (packed[:, 1] << 8) | (packed[:, 2] << 16)
+        samples = np.where(samples >= 1 << 23, samples - (1 << 24), samples)
+    else:
+        samples = np.frombuffer(raw, dtype={2: "<i2", 4: "<i4"}[sample_width])
+    scale = float(1 << (8 * sample_width - 1))
+    return samples.reshape(-1, channels).mean(axis=1, dtype=np.float32) / scale
+
+
+class AudioAnalyzer:
+    def __init__(self, path, block=AUDIO_BLOCK):
+        self.path = path
+        self.block = block
+        with wave.open(path, "rb") as wav:
+            self.rate = wav.getframerate()
+            self.duration = wav.getnframes() / self.rate
+        self.window = np.hanning(block).astype(np.float32)
+
+        # Frequency bins for the two driving bands and the radial lines
+        freqs = np.fft.rfftfreq(block, 1 / self.rate)
+        self.bass = (freqs >= BASS_BAND[0]) & (freqs < BASS_BAND[1])
+        self.mid = (freqs >= MID_BAND[0]) & (freqs < MID_BAND[1])
+        edges = np.geomspace(40, min(16000, self.rate / 2), LINE_COUNT + 1)
+        self.line_edges = np.searchsorted(freqs, edges)
+
+        # Running peaks for automatic gain: bass, mid, then one per line
+        self.peaks = np.full(2 + LINE_COUNT, 1e-9)
+
+        # Spectra waiting for playback to reach their timestamp
+        self.spectra = collections.deque()
+        self.current = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.start_time = None
+        self.thread = threading.Thread(target=self.produce, daemon=True)
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self.thread.start()
+
+    def playback_time(self):
+        return time.perf_counter() - self.start_time
+
+    def produce(self):
+        # Reads one block at a time, staying at most AUDIO_LOOKAHEAD ahead
+        with wave.open(self.path, "rb") as wav:
+            channels = wav.getnchannels()
+            sample_width = wav.getsampwidth()
+            position = 0
+            while not self.stop_event.is_set():
+                samples = decode_frames(
+                    wav.readframes(self.block), sample_width, channels
+                )
+                if not len(samples):
+                    break
+                if len(samples) < self.block:
+                    samples = np.pad(samples, (0, self.block - len(samples)))
+                features = self.analyze(np.fft.rfft(samples * self.window))
+                timestamp = position / self.rate
+                position += self.block
+                with self.lock:
+                    self.spectra.append((timestamp, features))
+                self.stop_event.wait(timestamp - AUDIO_LOOKAHEAD - self.playback_time())
+
+    def analyze(self, spectrum):
+        power = spectrum.real**2 + spectrum.imag**2
+        totals = np.concatenate(([0.0], np.cumsum(power)))
+        low = self.line_edges[:-1]
+        high = np.maximum(self.line_edges[1:], low + 1)
+        lines = (totals[high] - totals[low]) / (high - low)
+        energies = np.sqrt(
+            np.concatenate(([power[self.bass].mean(), power[self.mid].mean()], lines))
         )
-        surface.blit(surf, (int(self.x - self.size * 2), int(self.y - self.size * 2)))
 
-    def is_dead(self):
-        return self.life <= 0
+        # Slowly decaying peaks keep quiet and loud files in the same range
+        self.peaks = np.maximum(self.peaks * 0.999, energies)
+        levels = energies / np.maximum(self.peaks, self.peaks.max() * 0.01)
+        return {"bass": levels[0], "mid": levels[1], "lines": levels[2:]}
 
+    def latest(self):
+        # Newest spectrum that playback has reached; older ones are dropped
+        now = self.playback_time()
+        with self.lock:
+            while self.spectra and self.spectra[0][0] <= now:
+                self.current = self.spectra.popleft()[1]
+        return self.current
 
-# Voice waves class
-class VoiceWave:
-    def __init__(self, x, y, radius):
-        self.x = x
-        self.y = y
-        self.radius = radius
-        self.max_radius = radius + random.uniform(30, 70)
-        self.speed = random.uniform(1, 2)
-        self.alpha = 255
+    def finished(self):
+        return self.playback_time() > self.duration
 
-    def update(self):
-        self.radius += self.speed
-        self.alpha -= 5
+    def close(self):
+        self.stop_event.set()
 
-    def draw(self, surface):
-        if self.alpha > 0:
-            pygame.gfxdraw.aacircle(
-                surface,
-                int(self.x),
-                int(self.y),
-                int(self.radius),
-                (*GLOW_COLOR, self.alpha),
-            )
 
-    def is_dead(self):
-        return self.alpha <= 0 or self.radius >= self.max_radius
+# Pre-rendered microphone rings and body, per state and pulse phase
+CACHE_BODY = True
+PULSE_PHASES = 32
+body_sprites = {}
 
 
 # Microphone class
 class Microphone:
-    def __init__(self, x, y):
+    def __init__(self, x, y, particle_burst=PARTICLE_BURST):
         self.x = x
         self.y = y
         self.radius = 30
         self.inner_radius = 15
         self.activated = False
         self.pulse = 0
-        self.particles = []
-        self.waves = []
+        self.particle_burst = particle_burst
+        self.particles = ParticleSystem(
+            [SeekTarget(0.01), Age(), FadeOut(255)], PARTICLE_SPRITES
+        )
+        self.waves = ParticleSystem([Expand(), FadeStep(5)], WAVE_RINGS)
+
+        # Particles fly from the center to a random point 50-150px away
+        self.particle_emitter = Emitter(
+            x=x,
+            y=y,
+            angle=(0, math.pi * 2),
+            distance=(50, 150),
+            target_x=lambda p: x + np.cos(p["angle"]) * p["distance"],
+            target_y=lambda p: y + np.sin(p["angle"]) * p["distance"],
+            speed=(0.5, 2),
+            life=(50, 100),
+            size=(1, 3),
+            alpha=255,
+        )
+        self.wave_emitter = Emitter(
+            x=x,
+            y=y,
+            size=self.radius + 5,
+            reach=(30, 70),
+            max_size=lambda w: w["size"] + w["reach"],
+            speed=(1, 2),
+            alpha=255,
+        )
         self.lines = []
         self.generate_lines()
 
@@ -117,32 +221,39 @@ class Microphone:
             self.generate_particles()
 
     def generate_particles(self):
-        for _ in range(20):
-            self.particles.append(Particle(self.x, self.y))
+        self.particles.emit(self.particle_emitter, self.particle_burst)
 
     def generate_wave(self):
         if self.activated and random.random() < 0.1:
-            self.waves.append(VoiceWave(self.x, self.y, self.radius + 5))
+            self.waves.emit(self.wave_emitter, 1)
 
-    def update(self):
+    def update(self, spectrum=None):
         self.pulse = (self.pulse + 0.05) % (math.pi * 2)
 
-        # Update particles
-        for particle in self.particles[:]:
-            particle.update(self.activated)
-            if particle.is_dead():
-                self.particles.remove(particle)
-                if self.activated:
-                    self.particles.append(Particle(self.x, self.y))
+        # Update particles; they hold still while the microphone is off
+        dead = self.particles.update() if self.activated else 0
 
         # Update waves
-        for wave in self.waves[:]:
-            wave.update()
-            if wave.is_dead():
-                self.waves.remove(wave)
+        self.waves.update()
+
+        if spectrum is not None and self.activated:
+            # Audio drives emission: bass spawns particles, mids spawn waves
+            spawn = int(spectrum["bass"] * AUDIO_SPAWN_RATE)
+            if spawn:
+                self.particles.emit(self.particle_emitter, spawn)
+            if random.random() < spectrum["mid"] * AUDIO_WAVE_CHANCE:
+                self.waves.emit(self.wave_emitter, 1)
+
+            # Radial lines follow their log-spaced frequency bands
+            for line, level in zip(self.lines, spectrum["lines"]):
+                line["length"] += (40 + 60 * level - line["length"]) * 0.5
+        else:
+            # Replace the dead particles while active
+            if dead:
+                self.particles.emit(self.particle_emitter, dead)
 
-        # Generate new wave
-        self.generate_wave()
+            # Generate new wave
+            self.generate_wave()
 
     def draw(self, surface):
         # Draw background lines
@@ -159,15 +270,32 @@ class Microphone:
             )
 
         # Draw waves
-        for wave in self.waves:
-            wave.draw(surface)
+        self.waves.draw(surface)
+
+        # Draw particles, dimmed and frozen while the microphone is off
+        if self.activated:
+            self.particles.draw(surface)
+        elif len(self.particles):
+            particles = self.particles
+            PARTICLE_SPRITES.draw_arrays(
+                surface,
+                particles["x"],
+                particles["y"],
+                particles["size"],
+                np.full(len(particles), 50),
+                np.ones(len(particles)),
+            )
 
-        # Draw particles
-        for particle in self.particles:
-            particle.draw(surface, self.activated)
+        # Rings and body, from the sprite cache unless CACHE_BODY is off
+        if CACHE_BODY:
+            sprite = self.body_sprite()
+            half = sprite.get_width() // 2
+            surface.blit(sprite, (int(self.x) - half, int(self.y) - half))
+        else:
+            self.draw_body(surface, int(self.x), int(self.y), self.pulse)
 
+    def draw_body(self, surface, x, y, pulse):
         # Draw outer circle
-        glow_size = 2 + math.sin(self.pulse) * (2 if self.activated else 0.5)
         color = GLOW_COLOR if self.activated else GLOW_COLOR_DIM
 
         # Outer glow
@@ -176,27 +304,33 @@ class Microphone:
             alpha = 100 - i * 30
             if self.activated:
                 alpha += 50
-            pygame.gfxdraw.aacircle(
-                surface, int(self.x), int(self.y), int(size), (*color, alpha)
-            )
+            pygame.gfxdraw.aacircle(surface, x, y, int(size), (*color, alpha))
 
         # Main circle
-        pygame.draw.circle(surface, DARK_BG, (int(self.x), int(self.y)), self.radius)
-        pygame.gfxdraw.aacircle(surface, int(self.x), int(self.y), self.radius, color)
+        pygame.draw.circle(surface, DARK_BG, (x, y), self.radius)
+        pygame.gfxdraw.aacircle(surface, x, y, self.radius, color)
 
         # Inner circle
         if self.activated:
-            pulse_radius = self.inner_radius + math.sin(self.pulse) * 3
-            pygame.draw.circle(
-                surface, color, (int(self.x), int(self.y)), int(pulse_radius)
-            )
+            pulse_radius = self.inner_radius + math.sin(pulse) * 3
+            pygame.draw.circle(surface, color, (x, y), int(pulse_radius))
         else:
-            pygame.draw.circle(
-                surface, GRAY, (int(self.x), int(self.y)), self.inner_radius
-            )
-            pygame.gfxdraw.aacircle(
-                surface, int(self.x), int(self.y), self.inner_radius, WHITE
+            pygame.draw.circle(surface, GRAY, (x, y), self.inner_radius)
+            pygame.gfxdraw.aacircle(surface, x, y, self.inner_radius, WHITE)
+
+    def body_sprite(self):
+        # Only the active state pulses, so it alone needs several phases
+        phase = 0
+        if self.activated:
+            phase = int(self.pulse / (math.pi * 2) * PULSE_PHASES) % PULSE_PHASES
+        key = (self.radius, self.inner_radius, self.activated, phase)
+        if key not in body_sprites:
+            half = self.radius + 6
+            pulse = phase * math.pi * 2 / PULSE_PHASES
+            body_sprites[key] = matte_sprite(
+                half * 2, lambda layer: self.draw_body(layer, half, half, pulse)
             )
+        return body_sprites[key]
 
     def is_clicked(self, pos):
         dx = pos[0] - self.x
@@ -204,22 +338,69 @@ class Microphone:
         return dx * dx + dy * dy <= self.radius * self.radius
 
 
+def benchmark_body(frames=2000):
+    # Per-frame cost of the microphone rings and body, drawn vs cached
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    mic = Microphone(WIDTH // 2, HEIGHT // 2)
+    for activated in (False, True):
+        mic.activated = activated
+
+        # Build every phase up front so only the blits are timed
+        for phase in range(PULSE_PHASES):
+            mic.pulse = phase * math.pi * 2 / PULSE_PHASES
+            mic.body_sprite()
+
+        timings = {}
+        for mode in ("direct", "cached"):
+            start = time.perf_counter()
+            for _ in range(frames):
+                mic.pulse = (mic.pulse + 0.05) % (math.pi * 2)
+                if mode == "direct":
+                    mic.draw_body(screen, mic.x, mic.y, mic.pulse)
+                else:
+                    sprite = mic.body_sprite()
+                    half = sprite.get_width() // 2
+                    screen.blit(sprite, (mic.x - half, mic.y - half))
+            timings[mode] = (time.perf_counter() - start) / frames * 1e6
+        state = "active" if activated else "idle"
+        print(
+            f"{state:>6}: direct {timings['direct']:7.1f} us/frame, "
+            f"cached {timings['cached']:7.1f} us/frame "
+            f"({timings['direct'] / timings['cached']:.1f}x)"
+        )
+    print(f"{len(body_sprites)} cached sprites")
+
+
 # Main function
-def main():
+def main(wav_path=None):
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Futuristic AI Voice Interface")
     clock = pygame.time.Clock()
     running = True
 
     # Create microphone at center of screen
     mic = Microphone(WIDTH // 2, HEIGHT // 2)
 
+    # Optional WAV file driving the visualization, played back if possible
+    analyzer = None
+    if wav_path:
+        analyzer = AudioAnalyzer(wav_path)
+        try:
+            pygame.mixer.music.load(wav_path)
+            pygame.mixer.music.play()
+        except pygame.error:
+            pass  # No audio device: visualize silently
+        analyzer.start()
+        mic.toggle()
+
     # Font for text
-    font = pygame.font.SysFont(None, 24)
+    font = get_font(24)
 
     while running:
-        screen.fill(DARK_BG)
-
         # Handle events
         for event in pygame.event.get():
+            if profiler.handle_event(event):
+                continue
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -227,22 +408,40 @@ def main():
                     mic.toggle()
 
         # Update and draw microphone
-        mic.update()
-        mic.draw(screen)
-
-        # Draw instruction text
-        if not mic.activated:
-            text = font.render("Click the microphone to activate", True, WHITE)
-            screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT - 50))
-        else:
-            text = font.render("AI Voice Interface Active", True, GLOW_COLOR)
-            screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT - 50))
-
-        pygame.display.flip()
+        spectrum = None
+        if analyzer:
+            spectrum = analyzer.latest()
+            if analyzer.finished():
+                analyzer.close()
+                analyzer = None
+        with profiler.probe("update"):
+            mic.update(spectrum)
+        with profiler.probe("draw"):
+            screen.fill(DARK_BG)
+            mic.draw(screen)
+
+            # Draw instruction text
+            if not mic.activated:
+                text = render_text(font, "Click the microphone to activate", WHITE)
+                screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT - 50))
+            else:
+                text = render_text(font, "AI Voice Interface Active", GLOW_COLOR)
+                screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT - 50))
+
+        profiler.draw(screen)
+        with profiler.probe("flip"):
+            pygame.display.flip()
+        profiler.end_frame()
         clock.tick(60)
 
-    pygame.quit()
+    if analyzer:
+        analyzer.close()
 
 
 if __name__ == "__main__":
-    main()
+    # Usage: python AIVoice.py [file.wav | --bench]
+    if "--bench" in sys.argv:
+        benchmark_body()
+    else:
+        main(sys.argv[1] if len(sys.argv) > 1 else None)
+    pygame.quit()
@@ -1,8 +1,24 @@
 import pygame
 import math
 import random
+import sys
+import time
 from pygame import gfxdraw
 import numpy as np
+from particleEngine import (
+    Age,
+    Drift,
+    Emitter,
+    Expand,
+    FadeBySize,
+    FadeOut,
+    ParticleSystem,
+    RingRenderer,
+    Shrink,
+    SpriteRenderer,
+)
+import profiler
+from textCache import get_font, render_text
 
 # Initialize pygame
 pygame.init()
@@ -13,218 +29,307 @@ FPS = 60
 BG_COLOR = (10, 12, 20)
 ACCENT_COLOR = (0, 200, 255)
 SECONDARY_COLOR = (255, 100, 200)
+WAVE_RESOLUTION = 360  # Points around the wave ring; thousands are fine
+GRADIENT_ALPHA_STEP = 15  # Alpha quantization of the cached inner gradients
+PARTICLE_COLORS = 32  # Accent-to-secondary gradient steps for particle sprites
 
-# Set up the display
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Futuristic AI Voice Visualization")
-clock = pygame.time.Clock()
-
-
-# Particle class
-class Particle:
-    def __init__(self, x, y, angle, speed, size, color, life=None):
-        self.x = x
-        self.y = y
-        self.angle = angle
-        self.speed = speed
-        self.size = size
-        self.color = color
-        self.alpha = 255
-        self.life = life or random.randint(20, 60)
-        self.age = 0
-
-    def update(self):
-        self.x += math.cos(self.angle) * self.speed
-        self.y += math.sin(self.angle) * self.speed
-        self.age += 1
-        self.alpha = 255 * (1 - self.age / self.life)
-        self.size -= self.size / self.life
-        return self.age < self.life and self.size > 0.5
 
-    def draw(self, surface):
-        if self.alpha > 0:
-            color = list(self.color) + [int(self.alpha)]
-            gfxdraw.filled_circle(
-                surface, int(self.x), int(self.y), int(self.size), color
-            )
+# Generate a color gradient
+def get_gradient_color(percent, start_color, end_color):
+    r = start_color[0] + (end_color[0] - start_color[0]) * percent
+    g = start_color[1] + (end_color[1] - start_color[1]) * percent
+    b = start_color[2] + (end_color[2] - start_color[2]) * percent
+    return (int(r), int(g), int(b))
 
 
-# Voice wave class
-class VoiceWave:
-    def __init__(self, x, y, radius, color):
-        self.x = x
-        self.y = y
-        self.radius = radius
-        self.max_radius = radius * 4
-        self.color = color
-        self.alpha = 255
-        self.growing = True
-
-    def update(self):
-        if self.growing:
-            self.radius += 2
-            self.alpha = max(0, 255 * (1 - self.radius / self.max_radius))
-            if self.radius >= self.max_radius:
-                self.growing = False
-                self.alpha = 0
-        return self.alpha > 0
+# Accent-to-secondary color lookup table for radial gradients
+GRADIENT_LUT = np.array(
+    [get_gradient_color(i / 255, ACCENT_COLOR, SECONDARY_COLOR) for i in range(256)],
+    dtype=np.uint8,
+)
+gradient_sprites = {}
 
-    def draw(self, surface):
-        if self.alpha > 0:
-            color = list(self.color) + [int(self.alpha)]
-            pygame.gfxdraw.aacircle(
-                surface, int(self.x), int(self.y), int(self.radius), color
-            )
 
+def get_gradient_sprite(radius, alpha):
+    # Filled disk, ACCENT_COLOR at the center fading to SECONDARY_COLOR at the rim
+    alpha = min(255, round(alpha / GRADIENT_ALPHA_STEP) * GRADIENT_ALPHA_STEP)
+    key = (radius, alpha)
+    if key not in gradient_sprites:
+        offsets = np.arange(-radius, radius + 1)
+        distance = np.hypot(offsets[:, None], offsets[None, :])
+        percent = np.clip(distance / max(radius, 1), 0, 1)
+        coverage = np.clip(radius + 0.5 - distance, 0, 1)
 
-# Initialize variables
-particles = []
-waves = []
-center_x, center_y = WIDTH // 2, HEIGHT // 2
-base_radius = 50
-pulse_value = 0
-is_active = False
-activity_level = 0
-wave_points = np.zeros(360)
-last_spawn = 0
+        sprite = pygame.Surface((2 * radius + 1, 2 * radius + 1), pygame.SRCALPHA)
+        pygame.surfarray.pixels3d(sprite)[...] = GRADIENT_LUT[
+            (percent * 255).astype(np.uint8)
+        ]
+        pygame.surfarray.pixels_alpha(sprite)[...] = (coverage * alpha).astype(np.uint8)
+        gradient_sprites[key] = sprite
+    return gradient_sprites[key]
 
 
-# Generate a color gradient
-def get_gradient_color(percent, start_color, end_color):
-    r = start_color[0] + (end_color[0] - start_color[0]) * percent
-    g = start_color[1] + (end_color[1] - start_color[1]) * percent
-    b = start_color[2] + (end_color[2] - start_color[2]) * percent
-    return (int(r), int(g), int(b))
+# Particles take their gradient color from their direction; waves are rings
+PARTICLE_SPRITES = SpriteRenderer(
+    [
+        get_gradient_color(i / (PARTICLE_COLORS - 1), ACCENT_COLOR, SECONDARY_COLOR)
+        for i in range(PARTICLE_COLORS)
+    ],
+    max_radius=5,
+    min_radius=0,
+)
+WAVE_RINGS = RingRenderer(ACCENT_COLOR)
 
 
-# Draw a wave circle
+# Unit circle cos/sin tables, computed once per resolution
+unit_circles = {}
+
+
+def get_unit_circle(resolution):
+    if resolution not in unit_circles:
+        angles = np.linspace(0, 2 * math.pi, resolution, endpoint=False)
+        unit_circles[resolution] = (np.cos(angles), np.sin(angles))
+    return unit_circles[resolution]
+
+
+# Draw a wave circle as one closed polyline
 def draw_wave_circle(surface, x, y, radius, points, color, width=2):
-    prev_pos = None
-    for i in range(360):
-        angle = math.radians(i)
-        wave_radius = radius + points[i]
-        pos_x = x + math.cos(angle) * wave_radius
-        pos_y = y + math.sin(angle) * wave_radius
-        if prev_pos:
-            pygame.draw.line(surface, color, prev_pos, (pos_x, pos_y), width)
-        prev_pos = (pos_x, pos_y)
-
-    # Connect the last point to the first
-    angle = math.radians(0)
-    wave_radius = radius + points[0]
-    first_pos = (x + math.cos(angle) * wave_radius, y + math.sin(angle) * wave_radius)
-    pygame.draw.line(surface, color, prev_pos, first_pos, width)
-
-
-# Main game loop
-running = True
-while running:
-    # Handle events
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            is_active = True
-            activity_level = min(1.0, activity_level + 0.2)
+    cos_table, sin_table = get_unit_circle(len(points))
+    wave_radius = radius + points
+    ring = np.column_stack((x + cos_table * wave_radius, y + sin_table * wave_radius))
+    pygame.draw.lines(surface, color, True, ring.tolist(), width)
+
+
+class VoiceVisualizer:
+    def __init__(self, center_x, center_y, base_radius=50, seed=None):
+        # Everything is advanced in fixed 1/FPS steps of simulated time
+        self.center_x = center_x
+        self.center_y = center_y
+        self.base_radius = base_radius
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
+        self.particles = ParticleSystem(
+            [Drift(), Age(), FadeOut(255), Shrink()], PARTICLE_SPRITES
+        )
+        self.waves = ParticleSystem([Expand(), FadeBySize()], WAVE_RINGS)
+        self.pulse_value = 0
+        self.pulse_factor = 0.5
+        self.is_active = False
+        self.activity_level = 0
+        self.wave_points = np.zeros(WAVE_RESOLUTION)
+        self.time_ms = 0
+        self.last_spawn = 0
+        self.accumulator = 0.0
+
+        # Particles burst outward at a speed scaled by the current activity level
+        self.particle_emitter = Emitter(
+            self.np_rng,
+            x=center_x,
+            y=center_y,
+            angle=(0, 2 * math.pi),
+            pace=(1, 3),
+            speed=lambda p: p["pace"] * self.activity_level,
+            vx=lambda p: np.cos(p["angle"]) * p["speed"],
+            vy=lambda p: np.sin(p["angle"]) * p["speed"],
+            size=(2, 5),
+            # Use gradient color based on angle
+            color=lambda p: np.rint(
+                (np.cos(p["angle"]) + 1) * 0.5 * (PARTICLE_COLORS - 1)
+            ),
+            life=lambda p: self.np_rng.integers(20, 61, len(p["angle"])),
+            alpha=255,
+        )
+        self.wave_emitter = Emitter(
+            self.np_rng,
+            x=center_x,
+            y=center_y,
+            size=base_radius,
+            max_size=base_radius * 4,
+            speed=2,
+            alpha=255,
+        )
+
+    # Input: events from a window, or press/release from a script
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            self.press()
         elif event.type == pygame.MOUSEBUTTONUP:
-            is_active = False
+            self.release()
+
+    def press(self):
+        self.is_active = True
+        self.activity_level = min(1.0, self.activity_level + 0.2)
+
+    def release(self):
+        self.is_active = False
+
+    def update(self, dt):
+        # Whole steps only, capped so a long stall doesn't stack up work
+        self.accumulator = min(self.accumulator + dt, 5 / FPS)
+        while self.accumulator >= 1 / FPS:
+            self.accumulator -= 1 / FPS
+            self.step()
+
+    def step(self):
+        self.time_ms += 1000 / FPS
+
+        # Update pulse value
+        self.pulse_value = (self.pulse_value + 0.05) % (2 * math.pi)
+        self.pulse_factor = (math.sin(self.pulse_value) + 1) * 0.5
+
+        # Adjust activity level
+        if self.is_active:
+            self.activity_level = min(1.0, self.activity_level + 0.01)
+        else:
+            self.activity_level = max(0.0, self.activity_level - 0.02)
+        activity_level = self.activity_level
+
+        # Update wave points: smooth decay, plus random kicks based on activity level
+        self.wave_points *= 0.9
+        if activity_level > 0:
+            kicked = self.np_rng.random(WAVE_RESOLUTION) < activity_level * 0.2
+            self.wave_points[kicked] += self.np_rng.uniform(
+                0, 15 * activity_level, np.count_nonzero(kicked)
+            )
 
-    # Clear the screen
-    screen.fill(BG_COLOR)
+        # Spawn particles
+        if self.is_active and self.time_ms - self.last_spawn > 50:
+            self.particles.emit(self.particle_emitter, int(5 * activity_level))
+            self.last_spawn = self.time_ms
 
-    # Update pulse value
-    pulse_value = (pulse_value + 0.05) % (2 * math.pi)
-    pulse_factor = (math.sin(pulse_value) + 1) * 0.5
+            # Add wave circles occasionally
+            if self.rng.random() < 0.2 * activity_level:
+                self.waves.emit(self.wave_emitter, 1)
 
-    # Adjust activity level
-    if is_active:
-        activity_level = min(1.0, activity_level + 0.01)
-    else:
-        activity_level = max(0.0, activity_level - 0.02)
+        # Update particles and waves
+        self.particles.update()
+        self.waves.update()
 
-    # Update wave points
-    for i in range(360):
-        # Create a smooth base wave
-        wave_points[i] *= 0.9
-        if activity_level > 0:
-            # Add random fluctuations based on activity level
-            if random.random() < activity_level * 0.2:
-                wave_points[i] += random.uniform(0, 15 * activity_level)
-
-    # Spawn particles
-    current_time = pygame.time.get_ticks()
-    if is_active and current_time - last_spawn > 50:
-        for _ in range(int(5 * activity_level)):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(1, 3) * activity_level
-            size = random.uniform(2, 5)
+    def draw(self, surface):
+        center_x, center_y = self.center_x, self.center_y
+        pulse_factor = self.pulse_factor
+        activity_level = self.activity_level
+
+        # Draw particles and waves
+        with profiler.probe("particles"):
+            self.particles.draw(surface)
+            self.waves.draw(surface)
+
+        # Calculate current radius with pulse effect
+        current_radius = self.base_radius + pulse_factor * 5 + activity_level * 10
+
+        # Draw outer gradient circles
+        for i in range(5, 0, -1):
+            size_factor = i / 5
+            alpha = int(100 * size_factor * (0.5 + activity_level * 0.5))
+            outer_radius = current_radius + 20 * size_factor
+            outer_color = get_gradient_color(size_factor, ACCENT_COLOR, SECONDARY_COLOR)
+            outer_color = outer_color + (alpha,)
+            gfxdraw.aacircle(
+                surface, center_x, center_y, int(outer_radius), outer_color
+            )
 
-            # Use gradient color based on angle
-            percent = (math.cos(angle) + 1) * 0.5
-            color = get_gradient_color(percent, ACCENT_COLOR, SECONDARY_COLOR)
-
-            particles.append(Particle(center_x, center_y, angle, speed, size, color))
-        last_spawn = current_time
-
-        # Add wave circles occasionally
-        if random.random() < 0.2 * activity_level:
-            waves.append(VoiceWave(center_x, center_y, base_radius, ACCENT_COLOR))
-
-    # Update and draw particles
-    particles = [p for p in particles if p.update()]
-    for particle in particles:
-        particle.draw(screen)
-
-    # Update and draw waves
-    waves = [w for w in waves if w.update()]
-    for wave in waves:
-        wave.draw(screen)
-
-    # Calculate current radius with pulse effect
-    current_radius = base_radius + pulse_factor * 5 + activity_level * 10
-
-    # Draw outer gradient circles
-    for i in range(5, 0, -1):
-        size_factor = i / 5
-        alpha = int(100 * size_factor * (0.5 + activity_level * 0.5))
-        outer_radius = current_radius + 20 * size_factor
-        outer_color = get_gradient_color(size_factor, ACCENT_COLOR, SECONDARY_COLOR)
-        outer_color = outer_color + (alpha,)
-        pygame.gfxdraw.aacircle(
-            screen, center_x, center_y, int(outer_radius), outer_color
+        # Draw the wave circle
+        draw_wave_circle(
+            surface,
+            center_x,
+            center_y,
+            current_radius,
+            self.wave_points,
+            ACCENT_COLOR,
         )
 
-    # Draw the wave circle
-    draw_wave_circle(
-        screen, center_x, center_y, current_radius, wave_points, ACCENT_COLOR
-    )
-
-    # Draw inner circle (microphone)
-    inner_radius = int(current_radius * 0.7)
-    # Draw gradient fill for inner circle
-    for r in range(inner_radius, 0, -1):
-        percent = r / inner_radius
-        color = get_gradient_color(percent, ACCENT_COLOR, SECONDARY_COLOR)
+        # Draw inner circle (microphone)
+        inner_radius = int(current_radius * 0.7)
+        # Draw gradient fill for inner circle from the sprite cache
         alpha = int(150 + 105 * pulse_factor * activity_level)
-        color = color + (alpha,)
-        pygame.gfxdraw.aacircle(screen, center_x, center_y, r, color)
-
-    # Draw center dot
-    center_size = 5 + pulse_factor * 3 + activity_level * 5
-    pygame.draw.circle(screen, SECONDARY_COLOR, (center_x, center_y), center_size)
-
-    # Draw text
-    if activity_level > 0:
-        font = pygame.font.SysFont(None, 24)
-        alpha = int(255 * activity_level)
-        text_surface = font.render("AI LISTENING...", True, ACCENT_COLOR + (alpha,))
-        text_rect = text_surface.get_rect(
-            center=(center_x, center_y + current_radius + 40)
-        )
-        screen.blit(text_surface, text_rect)
+        gradient = get_gradient_sprite(inner_radius, alpha)
+        surface.blit(gradient, gradient.get_rect(center=(center_x, center_y)))
+
+        # Draw center dot
+        center_size = 5 + pulse_factor * 3 + activity_level * 5
+        pygame.draw.circle(surface, SECONDARY_COLOR, (center_x, center_y), center_size)
 
-    # Update the display
-    pygame.display.flip()
-    clock.tick(FPS)
+        # Draw text
+        if activity_level > 0:
+            # font.render ignores color alpha, so one cached surface serves all levels
+            text_surface = render_text(get_font(24), "AI LISTENING...", ACCENT_COLOR)
+            text_rect = text_surface.get_rect(
+                center=(center_x, center_y + current_radius + 40)
+            )
+            surface.blit(text_surface, text_rect)
+
+
+def benchmark(frames=600, instances=1):
+    # Scripted, seeded run on an offscreen surface: press, hold, then release
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    visualizers = [
+        VoiceVisualizer(WIDTH // 2, HEIGHT // 2, seed=i) for i in range(instances)
+    ]
+    update_time = draw_time = 0.0
+    for frame in range(frames):
+        for visualizer in visualizers:
+            if frame == 0:
+                visualizer.press()
+            elif frame == frames // 2:
+                visualizer.release()
+
+        start = time.perf_counter()
+        for visualizer in visualizers:
+            visualizer.update(1 / FPS)
+        middle = time.perf_counter()
+        surface.fill(BG_COLOR)
+        for visualizer in visualizers:
+            visualizer.draw(surface)
+        end = time.perf_counter()
+        update_time += middle - start
+        draw_time += end - middle
+    print(
+        f"{frames} frames x {instances} instance(s): "
+        f"update {update_time / frames * 1000:.3f} ms/frame, "
+        f"draw {draw_time / frames * 1000:.3f} ms/frame"
+    )
 
-pygame.quit()
+
+def main():
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Futuristic AI Voice Visualization")
+    clock = pygame.time.Clock()
+    visualizer = VoiceVisualizer(WIDTH // 2, HEIGHT // 2)
+
+    dt = 1 / FPS
+    running = True
+    while running:
+        # Handle events
+        for event in pygame.event.get():
+            if profiler.handle_event(event):
+                continue
+            if event.type == pygame.QUIT:
+                running = False
+            else:
+                visualizer.handle_event(event)
+
+        with profiler.probe("update"):
+            visualizer.update(dt)
+
+        # Clear the screen and draw
+        with profiler.probe("draw"):
+            screen.fill(BG_COLOR)
+            visualizer.draw(screen)
+        profiler.draw(screen)
+
+        # Update the display
+        with profiler.probe("flip"):
+            pygame.display.flip()
+        profiler.end_frame()
+        dt = clock.tick(FPS) / 1000
+
+
+if __name__ == "__main__":
+    # Usage: python AIVoice2.py [--bench [frames]]
+    if "--bench" in sys.argv:
+        args = sys.argv[sys.argv.index("--bench") + 1 :]
+        benchmark(int(args[0]) if args else 600)
+    else:
+        main()
+    pygame.quit()
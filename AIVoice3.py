@@ -3,14 +3,24 @@ import math
 import random
 from pygame import gfxdraw
 import colorsys
+import numpy as np
+from particleEngine import (
+    Emitter,
+    GrowThenDecay,
+    Orbit,
+    ParticleSystem,
+    SpriteRenderer,
+    circle_style,
+    ringed_disc_style,
+)
+import profiler
+from textCache import get_font, render_text
 
 # Initialize Pygame
 pygame.init()
 
 # Set up the display
 WIDTH, HEIGHT = 600, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Futuristic AI Voice Visualization")
 
 # Colors
 BACKGROUND = (10, 15, 30)
@@ -18,57 +28,40 @@ PRIMARY = (0, 180, 255)
 SECONDARY = (255, 100, 255)
 TERTIARY = (50, 255, 180)
 
+# Segments in the inner, middle and outer waveform rings (up to 4096 each)
+WAVEFORM_SEGMENTS = (48, 36, 64)
 
-# Particle class for voice visualization
-class VoiceParticle:
-    def __init__(self, x, y, size, color, speed=1.0, decay=0.95):
-        self.x = x
-        self.y = y
-        self.size = size
-        self.original_size = size
-        self.max_size = size * 4
-        self.color = color
-        self.alpha = 255
-        self.growing = True
-        self.speed = speed
-        self.decay = decay
-        self.angle = random.uniform(0, math.pi * 2)
-        self.distance = random.uniform(0, 100)
-        self.drift_speed = random.uniform(0.2, 1.0)
+# Orbit field: particles, trail points at full speed, frames between trail points
+ORBIT_PARTICLES = 20
+ORBIT_TRAIL = 4
+ORBIT_TRAIL_STRIDE = 8
+ORBIT_COLORS = 16  # Palette size; orbit sprites are cached per palette entry
+ORBIT_MAX_RADIUS = 5
+ORBIT_ALPHA_LEVELS = 9  # Fade steps, the last one fully opaque
 
-    def update(self):
-        # Update size based on growth state
-        if self.growing:
-            self.size = min(self.size * 1.1, self.max_size)
-            if self.size >= self.max_size * 0.95:
-                self.growing = False
-        else:
-            self.size *= self.decay
-            self.alpha *= self.decay
+# Voice particles are colored by their angle around the center; every hue,
+# radius and fade step is a sprite, so the table stays coarse
+PARTICLE_HUES = 16
+PARTICLE_ALPHA_LEVELS = 8
+PARTICLE_SPRITES = SpriteRenderer(
+    [
+        tuple(int(c * 255) for c in colorsys.hsv_to_rgb(i / PARTICLE_HUES, 0.8, 0.9))
+        for i in range(PARTICLE_HUES)
+    ],
+    ringed_disc_style,
+    PARTICLE_ALPHA_LEVELS,
+)
 
-        # Add some drift motion
-        self.x += math.cos(self.angle) * self.drift_speed
-        self.y += math.sin(self.angle) * self.drift_speed
 
-        # Adjust angle for orbital effect
-        self.angle += 0.01 * self.speed
+# Unit circle cos/sin tables shared by every waveform with the same segment count
+unit_circles = {}
 
-        return self.size > 0.5 and self.alpha > 10
 
-    def draw(self, surface):
-        # Calculate color with alpha
-        color = (*self.color, int(self.alpha))
-        # Draw with anti-aliasing using gfxdraw - using integer coordinates
-        gfxdraw.filled_circle(
-            surface, int(self.x), int(self.y), max(1, int(self.size)), color
-        )
-        gfxdraw.aacircle(
-            surface,
-            int(self.x),
-            int(self.y),
-            max(1, int(self.size)),
-            (*self.color, 255),
-        )
+def get_unit_circle(segments):
+    if segments not in unit_circles:
+        angles = 2 * np.pi * np.arange(segments) / segments
+        unit_circles[segments] = (np.cos(angles), np.sin(angles))
+    return unit_circles[segments]
 
 
 # Circular waveform visualizer
@@ -80,48 +73,53 @@ class CircularWaveform:
         self.current_radius = radius
         self.color = color
         self.segments = segments
-        self.amplitudes = [0] * segments
-        self.target_amplitudes = [0] * segments
+        self.amplitudes = np.zeros(segments)
+        self.target_amplitudes = np.zeros(segments)
         self.phase = 0
 
     def update(self, intensity):
         # Update phase for rotation
         self.phase += 0.02
 
-        # Generate new target amplitudes
-        for i in range(self.segments):
-            # Smoothly transition to new target values
-            if random.random() < 0.05:
-                self.target_amplitudes[i] = random.uniform(0, intensity * 30)
-
-            # Move current amplitude toward target
-            diff = self.target_amplitudes[i] - self.amplitudes[i]
-            self.amplitudes[i] += diff * 0.1
+        # Retarget a random 5% of segments, then ease every segment toward its target
+        retarget = np.random.random(self.segments) < 0.05
+        self.target_amplitudes[retarget] = np.random.uniform(
+            0, intensity * 30, np.count_nonzero(retarget)
+        )
+        self.amplitudes += (self.target_amplitudes - self.amplitudes) * 0.1
 
     def draw(self, surface):
-        points = []
-        for i in range(self.segments):
-            angle = 2 * math.pi * i / self.segments + self.phase
-            # Calculate radius with amplitude variation
-            radius = self.base_radius + self.amplitudes[i]
-            x = self.x + radius * math.cos(angle)
-            y = self.y + radius * math.sin(angle)
-            points.append((int(x), int(y)))  # Convert to integers
-
-        # Draw connecting lines with alpha gradient
-        for i in range(len(points)):
-            start = points[i]
-            end = points[(i + 1) % len(points)]
-
-            # Create gradient color based on amplitude
-            intensity = self.amplitudes[i] / 30
-            color = (
-                int(self.color[0] * (0.5 + 0.5 * intensity)),
-                int(self.color[1] * (0.5 + 0.5 * intensity)),
-                int(self.color[2] * (0.5 + 0.5 * intensity)),
+        # Rotate the shared table by the phase instead of recomputing angles
+        cos_table, sin_table = get_unit_circle(self.segments)
+        cos_phase, sin_phase = math.cos(self.phase), math.sin(self.phase)
+        radius = self.base_radius + self.amplitudes
+        points = np.column_stack(
+            (
+                self.x + radius * (cos_table * cos_phase - sin_table * sin_phase),
+                self.y + radius * (sin_table * cos_phase + cos_table * sin_phase),
             )
+        )
+
+        # One closed polyline, brightened by the ring's mean amplitude
+        brightness = 0.5 + 0.5 * float(self.amplitudes.mean()) / 30
+        color = tuple(int(c * brightness) for c in self.color)
+        return pygame.draw.lines(surface, color, True, points.tolist(), 2)
+
 
-            pygame.draw.line(surface, color, start, end, 2)
+def merge_rects(rects):
+    # Union overlapping rects until none overlap, so no pixel is composited twice
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        i = 0
+        while i < len(merged):
+            if merged[i].colliderect(rect):
+                rect.union_ip(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
 
 
 # Neon glow effect
@@ -141,6 +139,12 @@ def draw_with_glow(surface, color, center, radius, glow_radius=20):
             surface, center[0], center[1], radius + i, (*color[:3], int(alpha))
         )
 
+    # Area touched, for dirty-rect compositing
+    reach = radius + glow_radius + 1
+    return pygame.Rect(
+        center[0] - reach, center[1] - reach, 2 * reach + 1, 2 * reach + 1
+    )
+
 
 # Main microphone visualization
 class AIVoiceVisualization:
@@ -150,35 +154,46 @@ class AIVoiceVisualization:
         self.radius = 80
         self.outer_radius = 150
         self.active = False
-        self.particles = []
+        self.particles = ParticleSystem(
+            [GrowThenDecay(1.1), Orbit(0.01)], PARTICLE_SPRITES
+        )
         self.activity_level = 0
         self.pulse_size = 0
         self.waveform = CircularWaveform(
-            self.center_x, self.center_y, 120, PRIMARY, segments=48
+            self.center_x, self.center_y, 120, PRIMARY, segments=WAVEFORM_SEGMENTS[0]
         )
         self.second_waveform = CircularWaveform(
-            self.center_x, self.center_y, 180, SECONDARY, segments=36
+            self.center_x, self.center_y, 180, SECONDARY, segments=WAVEFORM_SEGMENTS[1]
         )
         self.outer_waveform = CircularWaveform(
-            self.center_x, self.center_y, 220, TERTIARY, segments=64
+            self.center_x, self.center_y, 220, TERTIARY, segments=WAVEFORM_SEGMENTS[2]
         )
-        self.orbit_particles = []
         self.time = 0
 
-        # Create initial orbit particles
-        for _ in range(20):
-            angle = random.uniform(0, math.pi * 2)
-            distance = random.uniform(240, 280)
-            speed = random.uniform(0.2, 0.8)
-            size = random.uniform(2, 5)
-            particle = {
-                "angle": angle,
-                "distance": distance,
-                "speed": speed,
-                "size": size,
-                "color": self.get_random_color(bright=True),
-            }
-            self.orbit_particles.append(particle)
+        # Persistent layer for everything that needs per-pixel alpha, and the
+        # regions of it drawn last frame (cleared in place before redrawing)
+        self.layer = None
+        self.layer_dirty = []
+
+        # Create initial orbit particles as arrays; faster ones get longer trails
+        count = ORBIT_PARTICLES
+        self.orbit_angle = np.random.uniform(0, math.pi * 2, count)
+        self.orbit_distance = np.random.uniform(240, 280, count)
+        self.orbit_speed = np.random.uniform(0.2, 0.8, count)
+        self.orbit_size = np.random.uniform(2, 5, count)
+        self.orbit_color = np.random.randint(0, ORBIT_COLORS, count)
+        self.orbit_trail = np.ceil(ORBIT_TRAIL * self.orbit_speed / 0.8).astype(int)
+        self.orbit_palette = [
+            self.get_random_color(bright=True) for _ in range(ORBIT_COLORS)
+        ]
+        self.orbit_sprites = SpriteRenderer(
+            self.orbit_palette, circle_style, ORBIT_ALPHA_LEVELS, ORBIT_MAX_RADIUS
+        )
+
+        # Ring buffer of past positions, one row per frame
+        self.orbit_history = np.empty((ORBIT_TRAIL * ORBIT_TRAIL_STRIDE + 1, count, 2))
+        self.orbit_history[:] = self.orbit_positions()
+        self.orbit_head = 0
 
     def get_random_color(self, bright=False):
         h = random.uniform(0, 1)
@@ -192,24 +207,30 @@ class AIVoiceVisualization:
         self.activity_level = min(1.0, self.activity_level + 0.2)
         self.pulse_size = min(30, self.pulse_size + 10)
 
-        # Generate particles
-        num_particles = int(random.randint(5, 15) * intensity)
-        for _ in range(num_particles):
-            angle = random.uniform(0, math.pi * 2)
-            distance = random.uniform(self.radius, self.radius * 1.5)
-            x = self.center_x + math.cos(angle) * distance
-            y = self.center_y + math.sin(angle) * distance
-            size = random.uniform(2, 8) * intensity
-
-            # Choose color based on position
-            hue = (math.atan2(y - self.center_y, x - self.center_x) + math.pi) / (
-                2 * math.pi
+        # Generate particles around the microphone, colored by their angle
+        center_x, center_y = self.center_x, self.center_y
+        emitter = Emitter(
+            direction=(0, math.pi * 2),
+            distance=(self.radius, self.radius * 1.5),
+            x=lambda p: center_x + np.cos(p["direction"]) * p["distance"],
+            y=lambda p: center_y + np.sin(p["direction"]) * p["distance"],
+            base_size=(2, 8),
+            size=lambda p: p["base_size"] * intensity,
+            max_size=lambda p: p["size"] * 4,
+            alpha=255,
+            growing=1,
+            decay=0.95,
+            color=lambda p: np.rint(
+                (np.arctan2(p["y"] - center_y, p["x"] - center_x) + math.pi)
+                / (2 * math.pi)
+                * PARTICLE_HUES
             )
-            r, g, b = colorsys.hsv_to_rgb(hue, 0.8, 0.9)
-            color = (int(r * 255), int(g * 255), int(b * 255))
-
-            particle = VoiceParticle(x, y, size, color, speed=random.uniform(0.5, 2.0))
-            self.particles.append(particle)
+            % PARTICLE_HUES,
+            angle=(0, math.pi * 2),
+            drift=(0.2, 1.0),
+            speed=(0.5, 2.0),
+        )
+        self.particles.emit(emitter, int(random.randint(5, 15) * intensity))
 
     def update(self):
         self.time += 0.01
@@ -222,7 +243,7 @@ class AIVoiceVisualization:
             self.pulse_size *= 0.9
 
         # Update particles
-        self.particles = [p for p in self.particles if p.update()]
+        self.particles.update()
 
         # Update waveforms with current activity level
         self.waveform.update(self.activity_level)
@@ -230,79 +251,108 @@ class AIVoiceVisualization:
         self.outer_waveform.update(self.activity_level * 0.6)
 
         # Update orbit particles
-        for particle in self.orbit_particles:
-            particle["angle"] += particle["speed"] * 0.01
-            # Make orbits pulse with activity
-            pulse = math.sin(self.time * 3) * 10 * self.activity_level
-            particle["distance"] = particle["distance"] + pulse
+        self.orbit_angle += self.orbit_speed * 0.01
+        # Make orbits pulse with activity
+        self.orbit_distance += math.sin(self.time * 3) * 10 * self.activity_level
+
+        # Record this frame's positions for the trails
+        self.orbit_head = (self.orbit_head + 1) % len(self.orbit_history)
+        self.orbit_history[self.orbit_head] = self.orbit_positions()
+
+    def orbit_positions(self):
+        return np.column_stack(
+            (
+                self.center_x + np.cos(self.orbit_angle) * self.orbit_distance,
+                self.center_y + np.sin(self.orbit_angle) * self.orbit_distance,
+            )
+        )
 
-    def draw(self, surface):
-        # Create a transparent surface for better blending
-        transparent = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-
-        # Draw outer waveforms
-        self.outer_waveform.draw(transparent)
-        self.second_waveform.draw(transparent)
-        self.waveform.draw(transparent)
-
-        # Draw orbit particles
-        for particle in self.orbit_particles:
-            x = int(self.center_x + math.cos(particle["angle"]) * particle["distance"])
-            y = int(self.center_y + math.sin(particle["angle"]) * particle["distance"])
-
-            # Add trail effect
-            trail_length = int(5 * particle["speed"])
-            for i in range(trail_length):
-                trail_angle = particle["angle"] - (i * 0.05)
-                trail_x = int(
-                    self.center_x + math.cos(trail_angle) * particle["distance"]
-                )
-                trail_y = int(
-                    self.center_y + math.sin(trail_angle) * particle["distance"]
-                )
-                alpha = 200 * (1 - i / trail_length)
-                # Use max(1, int()) to ensure we never pass a zero or negative radius
-                pygame.draw.circle(
-                    transparent,
-                    (*particle["color"], int(alpha)),
-                    (trail_x, trail_y),
-                    max(1, int(particle["size"] * (1 - i / trail_length))),
-                )
+    def draw_orbits(self, surface):
+        # Oldest trail points first so newer ones and the heads blend on top
+        history_length = len(self.orbit_history)
+        positions = []
+        radii = []
+        alphas = []
+        colors = []
+        for i in range(ORBIT_TRAIL, -1, -1):
+            show = self.orbit_trail >= i
+            if i == 0:
+                fade = np.ones(np.count_nonzero(show))
+                alpha = np.full(len(fade), 255.0)
+            else:
+                fade = 1 - i / (self.orbit_trail[show] + 1)
+                alpha = 200 * fade
+            row = (self.orbit_head - i * ORBIT_TRAIL_STRIDE) % history_length
+            positions.append(self.orbit_history[row, show])
+            radii.append(self.orbit_size[show] * fade)
+            alphas.append(alpha)
+            colors.append(self.orbit_color[show])
+        positions = np.concatenate(positions)
+        self.orbit_sprites.draw_arrays(
+            surface,
+            positions[:, 0],
+            positions[:, 1],
+            np.concatenate(radii),
+            np.concatenate(alphas),
+            np.concatenate(colors),
+        )
 
-            # Draw the particle
-            pygame.draw.circle(
-                transparent, particle["color"], (x, y), max(1, int(particle["size"]))
-            )
+    def draw(self, surface):
+        # Reuse the alpha layer, clearing only what was drawn into it last frame
+        if self.layer is None or self.layer.get_size() != surface.get_size():
+            self.layer = pygame.Surface(surface.get_size(), pygame.SRCALPHA)
+            self.layer_dirty = []
+        transparent = self.layer
+        for rect in self.layer_dirty:
+            transparent.fill((0, 0, 0, 0), rect)
+        dirty = []
+
+        # Opaque waveforms go straight to the screen
+        self.outer_waveform.draw(surface)
+        self.second_waveform.draw(surface)
+        self.waveform.draw(surface)
+
+        # Orbit particles and their trails are pre-faded sprites, blended directly
+        with profiler.probe("orbits"):
+            self.draw_orbits(surface)
 
         # Draw center microphone with glow effect
         pulse_effect = self.activity_level * 20
-        draw_with_glow(
-            transparent,
-            (*PRIMARY, 180),
-            (self.center_x, self.center_y),
-            self.radius + pulse_effect,
+        dirty.append(
+            draw_with_glow(
+                transparent,
+                (*PRIMARY, 180),
+                (self.center_x, self.center_y),
+                self.radius + pulse_effect,
+            )
         )
 
         # Draw voice particles
-        for particle in self.particles:
-            particle.draw(transparent)
+        with profiler.probe("particles"):
+            particle_rect = self.particles.draw(transparent)
+        if particle_rect:
+            dirty.append(particle_rect)
 
         # Draw pulse ring if active
         if self.pulse_size > 1:
+            dirty.append(
+                pygame.draw.circle(
+                    transparent,
+                    (*PRIMARY, 50),
+                    (self.center_x, self.center_y),
+                    int(self.radius + self.pulse_size),
+                    2,
+                )
+            )
+
+        # Add center detail
+        dirty.append(
             pygame.draw.circle(
                 transparent,
-                (*PRIMARY, 50),
+                (255, 255, 255, 200),
                 (self.center_x, self.center_y),
-                int(self.radius + self.pulse_size),
-                2,
+                int(self.radius * 0.7),
             )
-
-        # Add center detail
-        pygame.draw.circle(
-            transparent,
-            (255, 255, 255, 200),
-            (self.center_x, self.center_y),
-            int(self.radius * 0.7),
         )
 
         # Add microphone icon
@@ -331,23 +381,31 @@ class AIVoiceVisualization:
                 2,
             )
 
-        # Blit the transparent surface to the main screen
-        surface.blit(transparent, (0, 0))
+        # Composite only the regions drawn this frame
+        bounds = transparent.get_rect()
+        self.layer_dirty = [rect.clip(bounds) for rect in merge_rects(dirty)]
+        surface.blits(
+            [(transparent, rect, rect) for rect in self.layer_dirty], doreturn=False
+        )
 
 
 # Main game loop
 def main():
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Futuristic AI Voice Visualization")
     clock = pygame.time.Clock()
     running = True
 
     visualization = AIVoiceVisualization()
-    font = pygame.font.SysFont(None, 24)
+    font = get_font(24)
     last_click_time = 0
 
     while running:
         current_time = pygame.time.get_ticks()
 
         for event in pygame.event.get():
+            if profiler.handle_event(event):
+                continue
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -355,30 +413,32 @@ def main():
                 visualization.activate(random.uniform(0.5, 1.0))
                 last_click_time = current_time
 
-        # Fill the background
-        screen.fill(BACKGROUND)
-
         # Update and draw the visualization
-        visualization.update()
-        visualization.draw(screen)
-
-        # Draw instruction text
-        instruction = font.render(
-            "Click anywhere to simulate AI voice activity", True, (200, 200, 220)
-        )
-        screen.blit(
-            instruction, (WIDTH // 2 - instruction.get_width() // 2, HEIGHT - 40)
-        )
+        with profiler.probe("update"):
+            visualization.update()
+        with profiler.probe("draw"):
+            screen.fill(BACKGROUND)
+            visualization.draw(screen)
+
+            # Draw instruction text
+            instruction = render_text(
+                font, "Click anywhere to simulate AI voice activity", (200, 200, 220)
+            )
+            screen.blit(
+                instruction, (WIDTH // 2 - instruction.get_width() // 2, HEIGHT - 40)
+            )
 
         # Auto-trigger visualization occasionally if no recent clicks
         if current_time - last_click_time > 3000 and random.random() < 0.02:
             visualization.activate(random.uniform(0.3, 0.7))
 
-        pygame.display.flip()
+        profiler.draw(screen)
+        with profiler.probe("flip"):
+            pygame.display.flip()
+        profiler.end_frame()
         clock.tick(60)
 
-    pygame.quit()
-
 
 if __name__ == "__main__":
     main()
+    pygame.quit()
@@ -5,6 +5,8 @@ import random
 import sys
 import math
 from pygame import font
+import profiler
+from textCache import get_font, render_text
 
 # Initialize pygame
 pygame.init()
@@ -20,15 +22,12 @@ TEXT_COLOR = (220, 255, 220)
 TOKEN_RADIUS = 18
 ATTENTION_STRENGTH_MAX = 4
 
-# Set up the display
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Attention is All You Need - LLM Visualizer")
 clock = pygame.time.Clock()
 
 # Fonts
-small_font = pygame.font.SysFont("monospace", 14)
-medium_font = pygame.font.SysFont("monospace", 18)
-large_font = pygame.font.SysFont("monospace", 24)
+small_font = get_font(14, "monospace")
+medium_font = get_font(18, "monospace")
+large_font = get_font(24, "monospace")
 
 
 class Token:
@@ -57,7 +56,7 @@ class Token:
         pygame.draw.circle(surface, GREEN_DARK, self.position, TOKEN_RADIUS, 2)
 
         # Draw token text
-        text = small_font.render(self.value, True, TEXT_COLOR)
+        text = render_text(small_font, self.value, TEXT_COLOR)
         text_rect = text.get_rect(center=self.position)
         surface.blit(text, text_rect)
 
@@ -253,17 +252,17 @@ class AttentionVisualizer:
 
     def draw(self, surface):
         # Draw title
-        title = large_font.render("Attention Is All You Need", True, TEXT_COLOR)
+        title = render_text(large_font, "Attention Is All You Need", TEXT_COLOR)
         surface.blit(title, (WIDTH // 2 - title.get_width() // 2, 20))
 
         # Draw subtitle based on current phase
         if not self.generation_phase:
-            subtitle = medium_font.render(
-                "Reading Phase: Building Attention", True, GREEN_LIGHT
+            subtitle = render_text(
+                medium_font, "Reading Phase: Building Attention", GREEN_LIGHT
             )
         else:
-            subtitle = medium_font.render(
-                "Generation Phase: Using Attention", True, GREEN_LIGHT
+            subtitle = render_text(
+                medium_font, "Generation Phase: Using Attention", GREEN_LIGHT
             )
         surface.blit(subtitle, (WIDTH // 2 - subtitle.get_width() // 2, 50))
 
@@ -271,7 +270,8 @@ class AttentionVisualizer:
         active_token = None
         if 0 <= self.active_token_index < len(self.tokens):
             active_token = self.tokens[self.active_token_index]
-        self.draw_attention_lines(surface, active_token)
+        with profiler.probe("attention"):
+            self.draw_attention_lines(surface, active_token)
 
         # Draw all tokens
         for token in self.tokens:
@@ -293,24 +293,28 @@ class AttentionVisualizer:
 
             # Draw generated text
             generated_text = " ".join(self.generated_tokens)
-            text = medium_font.render(generated_text, True, TEXT_COLOR)
+            text = render_text(medium_font, generated_text, TEXT_COLOR)
             surface.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT - 100))
 
             # Draw "Generated:" label
-            label = small_font.render("Generated:", True, GREEN_LIGHT)
+            label = render_text(small_font, "Generated:", GREEN_LIGHT)
             surface.blit(label, (box_x + 10, box_y + 10))
 
         # Draw explanation text
         if not self.generation_phase:
-            explanation = small_font.render(
-                "Each token attends to others with varying strength", True, TEXT_COLOR
+            explanation = render_text(
+                small_font,
+                "Each token attends to others with varying strength",
+                TEXT_COLOR,
             )
             surface.blit(
                 explanation, (WIDTH // 2 - explanation.get_width() // 2, HEIGHT - 40)
             )
         else:
-            explanation = small_font.render(
-                "Using attention patterns to generate new tokens", True, TEXT_COLOR
+            explanation = render_text(
+                small_font,
+                "Using attention patterns to generate new tokens",
+                TEXT_COLOR,
             )
             surface.blit(
                 explanation, (WIDTH // 2 - explanation.get_width() // 2, HEIGHT - 40)
@@ -318,27 +322,34 @@ class AttentionVisualizer:
 
 
 def main():
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Attention is All You Need - LLM Visualizer")
     visualizer = AttentionVisualizer()
     running = True
 
     while running:
-        screen.fill(BACKGROUND)
-
         # Handle events
         for event in pygame.event.get():
+            if profiler.handle_event(event):
+                continue
             if event.type == pygame.QUIT:
                 running = False
 
         # Update and draw
-        visualizer.update()
-        visualizer.draw(screen)
-
-        pygame.display.flip()
+        with profiler.probe("update"):
+            visualizer.update()
+        with profiler.probe("draw"):
+            screen.fill(BACKGROUND)
+            visualizer.draw(screen)
+        profiler.draw(screen)
+
+        with profiler.probe("flip"):
+            pygame.display.flip()
+        profiler.end_frame()
         clock.tick(60)
 
-    pygame.quit()
-    sys.exit()
-
 
 if __name__ == "__main__":
     main()
+    pygame.quit()
+    sys.exit()
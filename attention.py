@@ -3,6 +3,8 @@ import numpy as np
 import random
 import math
 from pygame import gfxdraw
+import profiler
+from textCache import get_atlas, get_font, render_text
 
 # Initialize pygame
 pygame.init()
@@ -26,6 +28,10 @@ ATTENTION_HEADS = 4
 LAYERS = 3
 TOKEN_EMBEDDING_SIZE = 64
 MATRIX_CHARACTERS = "01"
+STREAM_SHADES = 16  # Brightness steps of the background code glyphs
+STREAM_COLORS = [
+    (0, int(100 + 155 * i / (STREAM_SHADES - 1)), 0) for i in range(STREAM_SHADES)
+]
 
 
 class MatrixCode:
@@ -68,15 +74,22 @@ class MatrixCode:
                     stream["intensities"][i] = random.random()
 
     def draw(self, screen):
+        # Glyphs in every shade live in one atlas, blitted in one batch
+        atlas = get_atlas(MATRIX_CHARACTERS, get_font(16, "monospace"), STREAM_COLORS)
+        blits = []
         for stream in self.streams:
             for i in range(stream["length"]):
                 y_pos = int(stream["y"] - i * 20)
                 if 0 <= y_pos < HEIGHT:
-                    intensity = stream["intensities"][i]
-                    color = (0, int(100 + 155 * intensity), 0)
-                    font = pygame.font.SysFont("monospace", 16)
-                    char = font.render(stream["chars"][i], True, color)
-                    screen.blit(char, (stream["x"], y_pos))
+                    shade = round(stream["intensities"][i] * (STREAM_SHADES - 1))
+                    blits.append(
+                        (
+                            atlas.surface,
+                            (stream["x"], y_pos),
+                            atlas.area(stream["chars"][i], shade),
+                        )
+                    )
+        screen.blits(blits, doreturn=False)
 
 
 class Token:
@@ -106,8 +119,7 @@ class Token:
         gfxdraw.aacircle(screen, int(self.x), int(self.y), self.radius, HIGHLIGHT_COLOR)
 
         # Draw token text
-        font = pygame.font.SysFont("Arial", 14)
-        text = font.render(self.text, True, TEXT_COLOR)
+        text = render_text(get_font(14, "Arial"), self.text, TEXT_COLOR)
         screen.blit(
             text, (self.x - text.get_width() // 2, self.y - text.get_height() // 2)
         )
@@ -223,8 +235,9 @@ class TransformerLayer:
 
     def draw(self, screen):
         # Draw layer label
-        font = pygame.font.SysFont("Arial", 18)
-        text = font.render(f"Transformer Layer {self.layer_index+1}", True, TEXT_COLOR)
+        text = render_text(
+            get_font(18, "Arial"), f"Transformer Layer {self.layer_index+1}", TEXT_COLOR
+        )
         screen.blit(text, (80, self.y + self.head_size / 2 - text.get_height() / 2))
 
         # Draw attention heads
@@ -232,11 +245,11 @@ class TransformerLayer:
             head.draw(screen)
 
         # Draw attention mechanism label
-        mechanism_font = pygame.font.SysFont("Arial", 14)
+        mechanism_font = get_font(14, "Arial")
         for i, mechanism in enumerate(
             ["Self-Attention", "Multi-Head Attention", "Feed Forward", "Layer Norm"]
         ):
-            text = mechanism_font.render(mechanism, True, TEXT_COLOR)
+            text = render_text(mechanism_font, mechanism, TEXT_COLOR)
             x = 200 + i * (self.head_size + 20) + self.head_size / 2
             screen.blit(text, (x - text.get_width() / 2, self.y - 25))
 
@@ -339,19 +352,22 @@ class LLMVisualizer:
 
     def draw(self, screen):
         # Draw matrix code background
-        self.matrix_code.draw(screen)
+        with profiler.probe("matrix code"):
+            self.matrix_code.draw(screen)
 
         # Draw title
-        title_font = pygame.font.SysFont("Arial", 36)
-        title = title_font.render("LLM Transformer Architecture", True, MATRIX_GREEN)
+        title = render_text(
+            get_font(36, "Arial"), "LLM Transformer Architecture", MATRIX_GREEN
+        )
         screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 20))
 
         # Draw "Attention is all you need" subtitle
-        subtitle_font = pygame.font.SysFont("Arial", 28)
+        # The subtitle color pulses every frame, so only the outline is cached
+        subtitle_font = get_font(28, "Arial")
         color = (0, self.attention_opacity, int(self.attention_opacity * 0.5))
         subtitle = subtitle_font.render("ATTENTION IS ALL YOU NEED", True, color)
-        subtitle_outline = subtitle_font.render(
-            "ATTENTION IS ALL YOU NEED", True, DARK_GREEN
+        subtitle_outline = render_text(
+            subtitle_font, "ATTENTION IS ALL YOU NEED", DARK_GREEN
         )
 
         # Create subtle glow effect
@@ -376,8 +392,9 @@ class LLMVisualizer:
             )
 
         # Draw transformer layers
-        for layer in self.layers:
-            layer.draw(screen)
+        with profiler.probe("layers"):
+            for layer in self.layers:
+                layer.draw(screen)
 
         # Draw connections between layers
         for i in range(len(self.layers) - 1):
@@ -400,8 +417,8 @@ class LLMVisualizer:
                 )
 
         # Draw thoughts
+        thought_font = get_font(16, "Arial")
         for thought in self.thoughts:
-            thought_font = pygame.font.SysFont("Arial", 16)
             text = thought_font.render(
                 thought["text"],
                 True,
@@ -410,7 +427,7 @@ class LLMVisualizer:
             screen.blit(text, (thought["x"], thought["y"]))
 
         # Draw explanation
-        explanation_font = pygame.font.SysFont("Arial", 14)
+        explanation_font = get_font(14, "Arial")
         explanations = [
             "LLMs are built on Transformer architecture",
             "Self-attention mechanism allows tokens to attend to each other",
@@ -421,13 +438,14 @@ class LLMVisualizer:
         ]
 
         for i, exp in enumerate(explanations):
-            text = explanation_font.render(exp, True, TEXT_COLOR)
+            text = render_text(explanation_font, exp, TEXT_COLOR)
             screen.blit(text, (WIDTH - text.get_width() - 20, HEIGHT - 150 + i * 20))
 
         # Draw status message
-        status_font = pygame.font.SysFont("Arial", 16)
-        status = status_font.render(
-            "Towards AGI: Matrix-themed LLM visualization", True, MATRIX_GREEN
+        status = render_text(
+            get_font(16, "Arial"),
+            "Towards AGI: Matrix-themed LLM visualization",
+            MATRIX_GREEN,
         )
         screen.blit(status, (20, HEIGHT - 30))
 
@@ -442,21 +460,27 @@ def main():
     running = True
     while running:
         for event in pygame.event.get():
+            if profiler.handle_event(event):
+                continue
             if event.type == pygame.QUIT:
                 running = False
 
         # Update
-        llm_visualizer.update()
+        with profiler.probe("update"):
+            llm_visualizer.update()
 
         # Draw
-        screen.fill(BACKGROUND)
-        llm_visualizer.draw(screen)
-
-        pygame.display.flip()
+        with profiler.probe("draw"):
+            screen.fill(BACKGROUND)
+            llm_visualizer.draw(screen)
+        profiler.draw(screen)
+
+        with profiler.probe("flip"):
+            pygame.display.flip()
+        profiler.end_frame()
         clock.tick(FPS)
 
-    pygame.quit()
-
 
 if __name__ == "__main__":
     main()
+    pygame.quit()
@@ -0,0 +1,392 @@
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows: no peak RSS
+
+# Headless frame-time benchmark for the eight visualizers. Each one runs in a
+# fresh process on the dummy video driver with seeded randomness and scripted
+# input, and its update and draw steps are timed separately every frame.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+import pygame
+import textCache
+
+FRAMES = 600
+WARMUP_FRAMES = 30  # Untimed frames first, so lazily built sprites don't count
+ALLOC_FRAMES = 120  # Extra frames run under tracemalloc, which is too slow to time
+REGRESSION = 0.10  # Compare flags a percentile this much slower...
+NOISE_MS = 0.1  # ...and more than this many ms slower
+PERCENTILES = (50, 95, 99)
+GATED_PERCENTILES = (50, 95)  # p99 is too noisy over a few hundred frames
+
+
+# Scenarios: setup(module, surface, rng) -> (update(frame), draw(frame)).
+# Input is scripted by frame number, so a given seed always sees the same clicks.
+
+
+def scenario_aivoice(module, surface, rng):
+    mic = module.Microphone(module.WIDTH // 2, module.HEIGHT // 2)
+
+    def update(frame):
+        # Switched on for 200 frames out of every 300
+        if frame % 300 in (0, 200):
+            mic.toggle()
+        mic.update()
+
+    def draw(frame):
+        surface.fill(module.DARK_BG)
+        mic.draw(surface)
+
+    return update, draw
+
+
+def scenario_aivoice2(module, surface, rng):
+    visualizer = module.VoiceVisualizer(
+        module.WIDTH // 2, module.HEIGHT // 2, seed=rng.randrange(2**32)
+    )
+
+    def update(frame):
+        # Held for 200 frames out of every 300, with extra presses while held
+        if frame % 300 == 200:
+            visualizer.release()
+        elif frame % 300 < 200 and frame % 20 == 0:
+            visualizer.press()
+        visualizer.update(1 / module.FPS)
+
+    def draw(frame):
+        surface.fill(module.BG_COLOR)
+        visualizer.draw(surface)
+
+    return update, draw
+
+
+def scenario_aivoice3(module, surface, rng):
+    visualization = module.AIVoiceVisualization()
+
+    def update(frame):
+        # A click every 45 frames
+        if frame % 45 == 0:
+            visualization.activate(rng.uniform(0.5, 1.0))
+        visualization.update()
+
+    def draw(frame):
+        surface.fill(module.BACKGROUND)
+        visualization.draw(surface)
+
+    return update, draw
+
+
+def scenario_attention(module, surface, rng):
+    visualizer = module.LLMVisualizer()
+
+    def draw(frame):
+        surface.fill(module.BACKGROUND)
+        visualizer.draw(surface)
+
+    return lambda frame: visualizer.update(), draw
+
+
+def scenario_llm_attention(module, surface, rng):
+    visualizer = module.AttentionVisualizer()
+
+    def draw(frame):
+        surface.fill(module.BACKGROUND)
+        visualizer.draw(surface)
+
+    return lambda frame: visualizer.update(), draw
+
+
+def scenario_neural_net(module, surface, rng):
+    # Training runs on a time budget inside update, so update time is mostly that
+    network = module.NeuralNetwork()
+
+    def draw(frame):
+        surface.fill(module.BACKGROUND)
+        network.draw(surface)
+
+    return lambda frame: network.update(), draw
+
+
+def scenario_matrix(module, surface, rng):
+    # The board draws straight to the module's screen
+    module.screen = surface
+    module.reset_game()
+    cells = [
+        (
+            module.BOARD_OFFSET_X + col * module.SQUARE_SIZE + module.SQUARE_SIZE // 2,
+            module.BOARD_OFFSET_Y + row * module.SQUARE_SIZE + module.SQUARE_SIZE // 2,
+        )
+        for row in range(module.BOARD_ROWS)
+        for col in range(module.BOARD_COLS)
+    ]
+    state = {"hover": cells[0]}
+
+    def update(frame):
+        # A move every 20 frames on a random cell, a new game once one ends
+        if frame % 20 == 0:
+            if module.game_over:
+                module.reset_game()
+            else:
+                state["hover"] = rng.choice(cells)
+                module.handle_click(*state["hover"])
+        module.matrix_rain.update()
+
+    def draw(frame):
+        module.draw_frame(state["hover"])
+
+    return update, draw
+
+
+def scenario_safe_game(module, surface, rng):
+    # Full repaint every frame on a virtual 60 FPS clock; the game itself only
+    # repaints what changed, so this is its worst case
+    game = module.GameState(module.LETTER_SPEED, module.GAME_TIME, 0.0, rng)
+    box_positions, scrolling_letters = module.build_layout(game)
+    state = {"foreground": None, "key": None, "noise": module.generate_noise()}
+
+    def update(frame):
+        # SPACE every 40 frames, a new game once one ends
+        now = frame / 60
+        ticks, _ = game.update(now)
+        if frame % 40 == 0:
+            if game.finished:
+                game.reset(now)
+            else:
+                game.press(now)
+        if ticks:
+            state["noise"] = module.generate_noise()
+        key = (
+            game.attempts_left,
+            game.current_box,
+            tuple(game.selected_letters),
+            tuple(game.box_states),
+            game.finished,
+        )
+        if key != state["key"]:
+            state["key"] = key
+            state["foreground"] = module.draw_foreground(box_positions, game)
+        state["timer"] = module.render_timer(int(game.time_left(now)))
+
+    def draw(frame):
+        scroller = None
+        if game.active_scroller():
+            scroller = scrolling_letters[game.current_box]
+        module.draw_frame(
+            surface,
+            surface.get_rect(),
+            state["noise"],
+            scroller,
+            0.0,
+            state["foreground"],
+            *state["timer"],
+        )
+
+    return update, draw
+
+
+SCENARIOS = {
+    "AIVoice": scenario_aivoice,
+    "AIVoice2": scenario_aivoice2,
+    "AIVoice3": scenario_aivoice3,
+    "attention": scenario_attention,
+    "LLMAttention": scenario_llm_attention,
+    "neuralNet": scenario_neural_net,
+    "matrix": scenario_matrix,
+    "safeGame": scenario_safe_game,
+}
+
+
+def seed_everything(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    # Generators created without a seed (particle emitters, the trainer) draw
+    # theirs from this sequence instead of OS entropy
+    sequence = np.random.SeedSequence(seed)
+    default_rng = np.random.default_rng
+    np.random.default_rng = lambda seed=None: default_rng(
+        sequence.spawn(1)[0] if seed is None else seed
+    )
+
+
+def summarize(values):
+    values = np.asarray(values)
+    summary = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+    summary["mean"] = float(values.mean())
+    summary["max"] = float(values.max())
+    return summary
+
+
+def run_visualizer(name, frames, seed):
+    # Runs in its own process: imports the module, then times update and draw
+    seed_everything(seed)
+    pygame.init()
+    module = importlib.import_module(name)
+    surface = pygame.display.set_mode((module.WIDTH, module.HEIGHT))
+    update, draw = SCENARIOS[name](module, surface, random.Random(seed))
+
+    update_ms, draw_ms = [], []
+    for frame in range(WARMUP_FRAMES + frames):
+        pygame.event.pump()
+        start = time.perf_counter()
+        update(frame)
+        middle = time.perf_counter()
+        draw(frame)
+        end = time.perf_counter()
+        if frame >= WARMUP_FRAMES:
+            update_ms.append((middle - start) * 1000)
+            draw_ms.append((end - middle) * 1000)
+
+    # Bytes allocated within each frame (peak over the frame's starting point)
+    # and what the frames kept. Only memory Python and numpy allocate is traced,
+    # not SDL surfaces
+    alloc_kb = []
+    tracemalloc.start()
+    retained_start = tracemalloc.get_traced_memory()[0]
+    for frame in range(WARMUP_FRAMES + frames, WARMUP_FRAMES + frames + ALLOC_FRAMES):
+        pygame.event.pump()
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        update(frame)
+        draw(frame)
+        alloc_kb.append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+    retained_kb = (tracemalloc.get_traced_memory()[0] - retained_start) / 1024
+    tracemalloc.stop()
+
+    peak_rss_mb = None
+    if resource:
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        peak_rss_mb = peak_rss / (2**20 if sys.platform == "darwin" else 2**10)
+
+    return name, {
+        "frames": frames,
+        "update_ms": summarize(update_ms),
+        "draw_ms": summarize(draw_ms),
+        "frame_ms": summarize(np.add(update_ms, draw_ms)),
+        "alloc_kb_per_frame": summarize(alloc_kb),
+        "retained_kb": retained_kb,
+        "peak_rss_mb": peak_rss_mb,
+        "text_cache": textCache.stats(),
+    }
+
+
+def run_suite(names, frames, seed):
+    # One fresh interpreter per visualizer, one at a time so runs don't compete
+    # for the CPU and each peak RSS is its own
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        for name in names:
+            _, results[name] = pool.apply(run_visualizer, (name, frames, seed))
+            print_result(name, results[name])
+    return results
+
+
+def print_header():
+    print(f"{'':<13} {'update ms':>20} {'draw ms':>20} {'alloc KB':>9} {'RSS MB':>7}")
+    print(f"{'':<13} {'p50   p95   p99':>20} {'p50   p95   p99':>20} {'mean':>9}")
+
+
+def print_result(name, result):
+    columns = [name.ljust(13)]
+    for key in ("update_ms", "draw_ms"):
+        columns.append(
+            " ".join(f"{result[key][f'p{p}']:6.2f}" for p in PERCENTILES).rjust(20)
+        )
+    columns.append(f"{result['alloc_kb_per_frame']['mean']:9.1f}")
+    rss = result["peak_rss_mb"]
+    columns.append(f"{rss:7.1f}" if rss is not None else f"{'-':>7}")
+    print(" ".join(columns))
+
+
+def compare(baseline, current):
+    # Prints percentile changes; returns the names of visualizers that got slower
+    regressions = []
+    print(f"{'':<13} {'':<10} {'p50':>15} {'p95':>15} {'p99':>15}")
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]
+        for key in ("update_ms", "draw_ms"):
+            columns, slower = [], False
+            for p in PERCENTILES:
+                old, new = before[key][f"p{p}"], result[key][f"p{p}"]
+                change = (new - old) / old if old else 0.0
+                columns.append(f"{new:6.2f} {change:+7.1%}")
+                if (
+                    p in GATED_PERCENTILES
+                    and change > REGRESSION
+                    and new - old > NOISE_MS
+                ):
+                    slower = True
+            flag = "  SLOWER" if slower else ""
+            print(f"{name:<13} {key[:-3]:<10} {' '.join(columns)}{flag}")
+            if slower and name not in regressions:
+                regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Headless update/draw frame times for the visualizers"
+    )
+    parser.add_argument("names", nargs="*", default=list(SCENARIOS))
+    parser.add_argument("--frames", type=int, default=FRAMES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this JSON file")
+    parser.add_argument(
+        "--compare",
+        nargs="+",
+        metavar="JSON",
+        help="compare against a baseline run, or compare two saved runs",
+    )
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown visualizer(s): {', '.join(unknown)}")
+
+    if args.compare and len(args.compare) > 1:
+        # Two saved runs: nothing to measure
+        with open(args.compare[1]) as f:
+            run = json.load(f)
+    else:
+        print_header()
+        start = time.perf_counter()
+        run = {
+            "frames": args.frames,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "results": run_suite(args.names, args.frames, args.seed),
+        }
+        print(f"{len(args.names)} visualizers in {time.perf_counter() - start:.1f}s")
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(run, f, indent=2)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare[0]}")
+        regressions = compare(baseline, run)
+        if regressions:
+            print(f"Slower: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import importlib
+import sys
+import time
+import pygame
+from textCache import get_font, init_sysfonts, render_text
+
+# Initialize pygame
+pygame.init()
+
+# Constants
+WIDTH, HEIGHT = 600, 500
+FPS = 30
+BACKGROUND = (5, 15, 5)
+TEXT_COLOR = (0, 200, 0)
+HIGHLIGHT_COLOR = (180, 255, 180)
+DIM_COLOR = (0, 100, 0)
+ROW_HEIGHT = 40
+MENU_TOP = 110
+
+# Every demo runs in this process: a module with a main() that sets up the
+# display it needs and returns when its window is closed. Modules are imported
+# only when first picked, then kept, so fonts, sprites and lookup tables built
+# by one run are reused by the next
+DEMOS = [
+    ("AIVoice", "Voice Interface"),
+    ("AIVoice2", "Voice Visualizer"),
+    ("AIVoice3", "Voice Orbits"),
+    ("attention", "LLM Transformer"),
+    ("LLMAttention", "Attention Is All You Need"),
+    ("neuralNet", "Neural Network"),
+    ("matrix", "Tic Tac Toe"),
+    ("safeGame", "Safe Cracking"),
+]
+
+
+def run_demo(module_name):
+    # Returns the import time in seconds, 0 when the module was already loaded
+    start = time.perf_counter()
+    loaded = module_name in sys.modules
+    module = importlib.import_module(module_name)
+    import_time = 0.0 if loaded else time.perf_counter() - start
+    module.main()
+    return import_time
+
+
+def draw_menu(surface, selected, import_times, startup_time):
+    font = get_font(36, "monospace")
+    small_font = get_font(20, "monospace")
+    surface.fill(BACKGROUND)
+
+    title = render_text(font, "GAMES & VISUALIZERS", TEXT_COLOR)
+    surface.blit(title, (WIDTH // 2 - title.get_width() // 2, 40))
+
+    for i, (module_name, label) in enumerate(DEMOS):
+        y = MENU_TOP + i * ROW_HEIGHT
+        color = HIGHLIGHT_COLOR if i == selected else TEXT_COLOR
+        if i == selected:
+            pygame.draw.rect(
+                surface, DIM_COLOR, (40, y - 4, WIDTH - 80, ROW_HEIGHT - 4)
+            )
+        text = render_text(small_font, f"{i + 1}. {label}", color)
+        surface.blit(text, (60, y + (ROW_HEIGHT - 8 - text.get_height()) // 2))
+
+        # Import cost of demos loaded so far
+        if module_name in import_times:
+            note = render_text(
+                small_font, f"{import_times[module_name] * 1000:.0f} ms", DIM_COLOR
+            )
+            surface.blit(
+                note,
+                (
+                    WIDTH - 60 - note.get_width(),
+                    y + (ROW_HEIGHT - 8 - note.get_height()) // 2,
+                ),
+            )
+
+    help_text = render_text(
+        small_font, "ENTER / CLICK TO RUN, CLOSE A DEMO TO RETURN", DIM_COLOR
+    )
+    surface.blit(help_text, (WIDTH // 2 - help_text.get_width() // 2, HEIGHT - 50))
+    startup = render_text(
+        small_font, f"startup {startup_time * 1000:.0f} ms", DIM_COLOR
+    )
+    surface.blit(startup, (WIDTH - startup.get_width() - 10, HEIGHT - 25))
+
+
+def main():
+    start = time.perf_counter()
+    # System font table from disk, so no font directory scan on a cold start
+    init_sysfonts()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Demo Launcher")
+    clock = pygame.time.Clock()
+    startup_time = time.perf_counter() - start
+
+    selected = 0
+    import_times = {}
+    while True:
+        launch = None
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    return
+                elif event.key == pygame.K_UP:
+                    selected = (selected - 1) % len(DEMOS)
+                elif event.key == pygame.K_DOWN:
+                    selected = (selected + 1) % len(DEMOS)
+                elif event.key in (pygame.K_RETURN, pygame.K_SPACE):
+                    launch = selected
+                elif pygame.K_1 <= event.key < pygame.K_1 + len(DEMOS):
+                    launch = selected = event.key - pygame.K_1
+            elif event.type == pygame.MOUSEMOTION:
+                row = (event.pos[1] - MENU_TOP) // ROW_HEIGHT
+                if 0 <= row < len(DEMOS):
+                    selected = row
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                row = (event.pos[1] - MENU_TOP) // ROW_HEIGHT
+                if 0 <= row < len(DEMOS):
+                    launch = selected = row
+
+        if launch is not None:
+            module_name = DEMOS[launch][0]
+            import_time = run_demo(module_name)
+            if import_time:
+                import_times[module_name] = import_time
+
+            # Back on the shared window: restore the menu's size and caption,
+            # and drop input left over from the demo
+            screen = pygame.display.set_mode((WIDTH, HEIGHT))
+            pygame.display.set_caption("Demo Launcher")
+            pygame.event.clear()
+            continue
+
+        draw_menu(screen, selected, import_times, startup_time)
+        pygame.display.flip()
+        clock.tick(FPS)
+
+
+if __name__ == "__main__":
+    main()
+    pygame.quit()
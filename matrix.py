@@ -3,6 +3,8 @@ import sys
 import random
 import time
 import math
+import profiler
+from textCache import get_atlas, get_font, render_text
 
 # Initialize pygame
 pygame.init()
@@ -29,23 +31,15 @@ HOVER_COLOR = (0, 100, 0, 100)  # With alpha for transparency
 MATRIX_RAIN_COLOR = (0, 210, 0)
 GAME_OVER_BG = (0, 0, 0, 190)
 
-# Set up the display
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Tic Tac Toe")
+screen = None  # Display surface, set up by main()
 clock = pygame.time.Clock()
 
-# Load fonts
-try:
-    matrix_font = pygame.font.Font("matrix.ttf", 36)
-    timer_font = pygame.font.Font("matrix.ttf", 60)
-    game_over_font = pygame.font.Font("matrix.ttf", 80)
-    player_font = pygame.font.Font("matrix.ttf", 42)
-except:
-    # Fallback to system font if matrix.ttf isn't available
-    matrix_font = pygame.font.SysFont("monospace", 36)
-    timer_font = pygame.font.SysFont("monospace", 60)
-    game_over_font = pygame.font.SysFont("monospace", 80)
-    player_font = pygame.font.SysFont("monospace", 42)
+# Load fonts, falling back to the system monospace font without matrix.ttf
+matrix_font = get_font(36, "monospace", "matrix.ttf")
+timer_font = get_font(60, "monospace", "matrix.ttf")
+game_over_font = get_font(80, "monospace", "matrix.ttf")
+player_font = get_font(42, "monospace", "matrix.ttf")
+RAIN_CHARS = "".join(chr(code) for code in range(33, 127))
 
 # Board setup
 board = [[None for _ in range(BOARD_COLS)] for _ in range(BOARD_ROWS)]
@@ -83,6 +77,8 @@ class MatrixRain:
                 char["char"] = chr(random.randint(33, 126))
 
     def draw(self, surface):
+        # Every glyph comes from one atlas per font size, blitted in one batch
+        blits = []
         for char in self.chars:
             # Don't draw matrix rain over the game board area
             if (
@@ -91,9 +87,13 @@ class MatrixRain:
             ):
                 continue
 
-            font = pygame.font.SysFont("monospace", char["size"])
-            text = font.render(char["char"], True, MATRIX_RAIN_COLOR)
-            surface.blit(text, (char["x"], char["y"]))
+            atlas = get_atlas(
+                RAIN_CHARS, get_font(char["size"], "monospace"), [MATRIX_RAIN_COLOR]
+            )
+            blits.append(
+                (atlas.surface, (char["x"], char["y"]), atlas.area(char["char"]))
+            )
+        surface.blits(blits, doreturn=False)
 
 
 matrix_rain = MatrixRain()
@@ -304,9 +304,9 @@ def draw_timer():
 
     # Draw current player indicator centered under the timer bar
     if not game_over:
-        player_text = player_font.render(
+        player_text = render_text(
+            player_font,
             f"PLAYER {player}'S TURN",
-            True,
             CROSS_COLOR if player == "X" else CIRCLE_COLOR,
         )
         screen.blit(player_text, (WIDTH // 2 - player_text.get_width() // 2, 810))
@@ -456,6 +456,7 @@ def draw_game_over():
     glow_offset = int((time.time() * 5) % 50)
     glow_color = (0, 200 + glow_offset, 0)
 
+    # The glow changes every frame, so this stays out of the text cache
     game_over_text = game_over_font.render(text, True, glow_color)
     screen.blit(
         game_over_text,
@@ -466,7 +467,7 @@ def draw_game_over():
     )
 
     # Restart instruction
-    restart_text = matrix_font.render("PRESS 'R' TO RESTART SYSTEM", True, TIMER_COLOR)
+    restart_text = render_text(matrix_font, "PRESS 'R' TO RESTART SYSTEM", TIMER_COLOR)
     screen.blit(
         restart_text,
         (
@@ -502,58 +503,58 @@ def draw_game_over():
         screen.blit(glitch_surface, (x, y))
 
 
-# Game loop
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
-
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_r and game_over:
-                # Reset game
-                board = [[None for _ in range(BOARD_COLS)] for _ in range(BOARD_ROWS)]
-                player = "X"
-                game_over = False
-                winner = None
-                winning_line = None
-                start_time = time.time()
-
-        if event.type == pygame.MOUSEBUTTONDOWN and not game_over:
-            mouseX, mouseY = pygame.mouse.get_pos()
-
-            # Check if click is within board boundaries
-            if (
-                BOARD_OFFSET_X <= mouseX <= BOARD_OFFSET_X + 3 * SQUARE_SIZE
-                and BOARD_OFFSET_Y <= mouseY <= BOARD_OFFSET_Y + 3 * SQUARE_SIZE
-            ):
+# Reset the board, turn and timer for a new game
+def reset_game():
+    global board, player, game_over, winner, winning_line, start_time
+    board = [[None for _ in range(BOARD_COLS)] for _ in range(BOARD_ROWS)]
+    player = "X"
+    game_over = False
+    winner = None
+    winning_line = None
+    start_time = time.time()
+
+
+# Place the current player's mark at a clicked point, if it's on a free cell
+def handle_click(mouseX, mouseY):
+    global player, game_over, winner, winning_line, start_time
+
+    # Check if click is within board boundaries
+    if (
+        BOARD_OFFSET_X <= mouseX <= BOARD_OFFSET_X + 3 * SQUARE_SIZE
+        and BOARD_OFFSET_Y <= mouseY <= BOARD_OFFSET_Y + 3 * SQUARE_SIZE
+    ):
+
+        # Convert mouse position to board indices
+        col = (mouseX - BOARD_OFFSET_X) // SQUARE_SIZE
+        row = (mouseY - BOARD_OFFSET_Y) // SQUARE_SIZE
+
+        # Make a move if the cell is empty
+        if board[row][col] is None:
+            board[row][col] = player
 
-                # Convert mouse position to board indices
-                col = (mouseX - BOARD_OFFSET_X) // SQUARE_SIZE
-                row = (mouseY - BOARD_OFFSET_Y) // SQUARE_SIZE
+            # Check for win
+            result, cells = check_win()
+            if result:
+                winner = result
+                winning_line = cells
+                game_over = True
 
-                # Make a move if the cell is empty
-                if board[row][col] is None:
-                    board[row][col] = player
+            # Switch player and reset timer
+            player = "O" if player == "X" else "X"
+            start_time = time.time()  # Reset timer for next player
 
-                    # Check for win
-                    result, cells = check_win()
-                    if result:
-                        winner = result
-                        winning_line = cells
-                        game_over = True
 
-                    # Switch player and reset timer
-                    player = "O" if player == "X" else "X"
-                    start_time = time.time()  # Reset timer for next player
+# Draw one frame with the hover effect under mouse_pos; also ends the game when
+# the timer runs out
+def draw_frame(mouse_pos):
+    global game_over, winner
 
     # Fill the screen with the background color
     screen.fill(BG_COLOR)
 
-    # Update and draw matrix rain
-    matrix_rain.update()
-    matrix_rain.draw(screen)
+    # Draw matrix rain
+    with profiler.probe("rain"):
+        matrix_rain.draw(screen)
 
     # Draw board
     draw_board()
@@ -565,7 +566,7 @@ while running:
 
     # Draw hover effect for the current cell
     if not game_over:
-        mouseX, mouseY = pygame.mouse.get_pos()
+        mouseX, mouseY = mouse_pos
         if (
             BOARD_OFFSET_X <= mouseX <= BOARD_OFFSET_X + 3 * SQUARE_SIZE
             and BOARD_OFFSET_Y <= mouseY <= BOARD_OFFSET_Y + 3 * SQUARE_SIZE
@@ -587,9 +588,46 @@ while running:
         draw_game_over()
 
     # Draw title
-    title_text = matrix_font.render("TIC TAC TOE", True, LINE_COLOR)
+    title_text = render_text(matrix_font, "TIC TAC TOE", LINE_COLOR)
     screen.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, 10))
 
-    # Update the display
-    pygame.display.flip()
-    clock.tick(60)
+
+# Game loop: returns when the window is closed
+def main():
+    global screen
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Tic Tac Toe")
+    reset_game()
+
+    while True:
+        for event in pygame.event.get():
+            if profiler.handle_event(event):
+                continue
+            if event.type == pygame.QUIT:
+                return
+
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_r and game_over:
+                    reset_game()
+
+            if event.type == pygame.MOUSEBUTTONDOWN and not game_over:
+                handle_click(*pygame.mouse.get_pos())
+
+        # Update matrix rain, then draw everything
+        with profiler.probe("update"):
+            matrix_rain.update()
+        with profiler.probe("draw"):
+            draw_frame(pygame.mouse.get_pos())
+        profiler.draw(screen)
+
+        # Update the display
+        with profiler.probe("flip"):
+            pygame.display.flip()
+        profiler.end_frame()
+        clock.tick(60)
+
+
+if __name__ == "__main__":
+    main()
+    pygame.quit()
+    sys.exit()
@@ -2,7 +2,17 @@ import pygame
 import numpy as np
 import random
 import math
+import os
+import struct
+import sys
+import threading
+import time
+import zipfile
+from itertools import islice
+from collections import deque
 from pygame import gfxdraw
+import profiler
+import textCache
 
 # Initialize pygame
 pygame.init()
@@ -19,17 +29,412 @@ TEXT_COLOR = (180, 255, 200)
 HIGHLIGHT_COLOR = (200, 255, 220)
 
 # Neural Network Parameters
-INPUT_NEURONS = 5
-HIDDEN_NEURONS = 8
-OUTPUT_NEURONS = 3
-TOTAL_NEURONS = INPUT_NEURONS + HIDDEN_NEURONS + OUTPUT_NEURONS
+LAYER_SIZES = [5, 8, 3]  # e.g. [784, 256, 128, 10]
+MAX_VISIBLE_NEURONS = 32  # Larger layers are drawn as groups of neurons
+EDGE_DENSITY_THRESHOLD = 1024  # Edges per layer pair before level of detail kicks in
+EDGE_LOD = "bundle"  # "bundle" averages blocks of edges, "subsample" draws a sample
+EDGE_COLOR_LEVELS = 8
+EDGE_LAYER_KEY = (255, 0, 255)  # Transparent color of the cached edge layer
+EDGE_WIDTH_SLACK = 0.5  # Width steps a weight may overshoot before a redraw
+PULSE_RADIUS = 5
+MAX_PULSING_EDGES = 256  # Edge count above which firing is scaled down
+
+# Training Parameters
+DATASET = "spirals"  # "spirals", "xor" or "blobs"
+BATCH_SIZE = 64
+LEARNING_RATE = 0.01
+TRAIN_BUDGET_MS = 8  # Time spent on training steps per frame
+LOSS_HISTORY = 300  # Frames of loss shown in the HUD curve
+CHECKPOINT_PATH = "neuralNet_checkpoint.npz"  # Written with S, read with L
+
+# Input Stream Parameters
+STREAM_SOURCE = None  # None for synthetic DATASET samples, or a .csv/.npy file
+STREAM_CHUNK = 256  # Samples read per chunk; files hold features then a label column
+STREAM_BUFFER = 4096  # Ring buffer capacity in samples
+DATA_POINTS = 20
+
+
+def make_points(name, n, classes, rng):
+    # Sample 2D points and labels for one of the synthetic datasets
+    labels = rng.integers(0, classes, n)
+    if name == "spirals":
+        radius = rng.uniform(0.05, 1.0, n)
+        angle = labels * (2 * math.pi / classes) + radius * 4 + rng.normal(0, 0.2, n)
+        points = np.stack([radius * np.cos(angle), radius * np.sin(angle)], axis=1)
+    elif name == "xor":
+        points = rng.uniform(-1, 1, (n, 2))
+        labels = (points[:, 0] * points[:, 1] > 0).astype(np.int64) % classes
+    elif name == "blobs":
+        centers = np.stack(
+            [
+                np.cos(np.arange(classes) * 2 * math.pi / classes),
+                np.sin(np.arange(classes) * 2 * math.pi / classes),
+            ],
+            axis=1,
+        )
+        points = centers[labels] * 0.6 + rng.normal(0, 0.2, (n, 2))
+    else:
+        raise ValueError(f"Unknown dataset: {name}")
+    return points, labels
+
+
+def expand_features(points, n_features):
+    # Polynomial features first, then fixed random Fourier features to fill the input layer
+    a, b = points[:, 0], points[:, 1]
+    columns = [a, b, a * b, a * a, b * b]
+    extra = n_features - len(columns)
+    if extra > 0:
+        projection_rng = np.random.default_rng(0)
+        projection = projection_rng.normal(0, 2, (2, extra))
+        phase = projection_rng.uniform(0, 2 * math.pi, extra)
+        columns.extend(np.sin(points @ projection + phase).T)
+    return np.stack(columns[:n_features], axis=1).astype(np.float32)
+
+
+def make_dataset(name, n, n_features, classes, rng=None):
+    rng = rng or np.random.default_rng()
+    points, labels = make_points(name, n, classes, rng)
+    return expand_features(points, n_features), labels
+
+
+def synthetic_chunks(n_features, classes, dataset=DATASET):
+    rng = np.random.default_rng()
+    while True:
+        yield make_dataset(dataset, STREAM_CHUNK, n_features, classes, rng)
+
+
+def npy_chunks(path):
+    data = np.load(path, mmap_mode="r")
+    if not len(data):
+        raise ValueError(f"{path} has no rows")
+    while True:
+        for start in range(0, len(data), STREAM_CHUNK):
+            chunk = np.asarray(data[start : start + STREAM_CHUNK], dtype=np.float32)
+            yield chunk[:, :-1], chunk[:, -1].astype(np.int64)
+
+
+def csv_chunks(path):
+    rows = 0
+    while True:
+        with open(path) as f:
+            while True:
+                lines = list(islice(f, STREAM_CHUNK))
+                if not lines:
+                    break
+                chunk = np.loadtxt(lines, delimiter=",", ndmin=2, dtype=np.float32)
+                rows += len(chunk)
+                yield chunk[:, :-1], chunk[:, -1].astype(np.int64)
+        # An empty file would otherwise be reopened forever
+        if not rows:
+            raise ValueError(f"{path} has no rows")
+
+
+def make_chunks(source, n_features, classes):
+    # Endless generator of (features, labels) chunks, looping over files
+    if source is None:
+        return synthetic_chunks(n_features, classes)
+    if source.endswith(".npy"):
+        return npy_chunks(source)
+    return csv_chunks(source)
+
+
+class DataStream:
+    def __init__(self, chunks, n_features, capacity=STREAM_BUFFER):
+        # Bounded ring buffer filled ahead of time by a background thread
+        self.n_features = n_features
+        self.capacity = capacity
+        self.features = np.zeros((capacity, n_features), dtype=np.float32)
+        self.labels = np.zeros(capacity, dtype=np.int64)
+        self.head = 0
+        self.count = 0
+        self.consumed = 0
+        self.samples_per_second = 0.0
+        self.rate_time = time.perf_counter()
+        self.rate_consumed = 0
+        self.error = None
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(
+            target=self.prefetch, args=(chunks,), daemon=True
+        )
+        self.thread.start()
+
+    def prefetch(self, chunks):
+        try:
+            for features, labels in chunks:
+                if features.shape[1] != self.n_features:
+                    raise ValueError(
+                        f"Stream has {features.shape[1]} features, "
+                        f"the input layer has {self.n_features}"
+                    )
+                offset = 0
+                while offset < len(features):
+                    with self.condition:
+                        while self.count == self.capacity and not self.closed:
+                            self.condition.wait()
+                        if self.closed:
+                            return
+                        n = min(len(features) - offset, self.capacity - self.count)
+                        slots = (self.head + self.count + np.arange(n)) % self.capacity
+                        self.features[slots] = features[offset : offset + n]
+                        self.labels[slots] = labels[offset : offset + n]
+                        self.count += n
+                    offset += n
+        except Exception as error:
+            self.error = error
+
+    def take(self, n):
+        # Returns up to n samples without waiting; fewer means input is the bottleneck
+        with self.condition:
+            if self.error:
+                raise self.error
+            n = min(n, self.count)
+            slots = (self.head + np.arange(n)) % self.capacity
+            features, labels = self.features[slots], self.labels[slots]
+            self.head = (self.head + n) % self.capacity
+            self.count -= n
+            self.consumed += n
+            self.condition.notify()
+        return features, labels
+
+    def fill_level(self):
+        return self.count / self.capacity
+
+    def update_rate(self):
+        now = time.perf_counter()
+        if now - self.rate_time >= 0.5:
+            rate = (self.consumed - self.rate_consumed) / (now - self.rate_time)
+            self.samples_per_second += (rate - self.samples_per_second) * 0.5
+            self.rate_time = now
+            self.rate_consumed = self.consumed
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+
+def load_checkpoint_arrays(path, mode="c"):
+    # np.load ignores mmap_mode for .npz files, so map each stored member directly.
+    # "r" shares pages read-only between processes, "c" allows copy-on-write training.
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path} is compressed and cannot be memory-mapped")
+
+            # Skip the zip local file header to reach the .npy member
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack("<HH", f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+            name = info.filename[: -len(".npy")]
+            count = int(np.prod(shape))
+            if count == 0 or shape == ():
+                arrays[name] = np.frombuffer(
+                    f.read(dtype.itemsize * count), dtype=dtype
+                ).reshape(shape)
+            else:
+                arrays[name] = np.memmap(
+                    path,
+                    dtype=dtype,
+                    mode=mode,
+                    offset=f.tell(),
+                    shape=shape,
+                    order="F" if fortran_order else "C",
+                )
+    return arrays
+
+
+class Trainer:
+    def __init__(self, layer_sizes, state=None):
+        self.rng = np.random.default_rng()
+        self.layer_sizes = list(layer_sizes)
+        self.frozen = False
+        if state is not None:
+            layers = range(len(self.layer_sizes) - 1)
+            self.weights = [state[f"weights_{i}"] for i in layers]
+            self.biases = [state[f"biases_{i}"] for i in layers]
+            self.m_weights = [state[f"m_weights_{i}"] for i in layers]
+            self.v_weights = [state[f"v_weights_{i}"] for i in layers]
+            self.m_biases = [state[f"m_biases_{i}"] for i in layers]
+            self.v_biases = [state[f"v_biases_{i}"] for i in layers]
+            self.step = int(state["step"])
+        else:
+            self.weights = []
+            self.biases = []
+            for n_in, n_out in zip(self.layer_sizes[:-1], self.layer_sizes[1:]):
+                scale = np.sqrt(1.0 / n_in)
+                self.weights.append(
+                    self.rng.normal(0, scale, (n_in, n_out)).astype(np.float32)
+                )
+                self.biases.append(np.zeros(n_out, dtype=np.float32))
+
+            # Adam optimizer state
+            self.m_weights = [np.zeros_like(w) for w in self.weights]
+            self.v_weights = [np.zeros_like(w) for w in self.weights]
+            self.m_biases = [np.zeros_like(b) for b in self.biases]
+            self.v_biases = [np.zeros_like(b) for b in self.biases]
+            self.step = 0
+
+        self.gradients = [np.zeros_like(w) for w in self.weights]
+        self.loss = 0.0
+        self.accuracy = 0.0
+        self.loss_history = deque(maxlen=LOSS_HISTORY)
+        self.steps_per_second = 0.0
+
+    @classmethod
+    def from_checkpoint(cls, path, read_only=False):
+        # Layer sizes come from the checkpoint, not from LAYER_SIZES
+        state = load_checkpoint_arrays(path, mode="r" if read_only else "c")
+        trainer = cls(state["layer_sizes"].tolist(), state=state)
+        trainer.frozen = read_only
+        return trainer
+
+    def save_checkpoint(self, path):
+        arrays = {
+            "layer_sizes": np.array(self.layer_sizes),
+            "step": np.array(self.step),
+        }
+        for i in range(len(self.weights)):
+            arrays[f"weights_{i}"] = self.weights[i]
+            arrays[f"biases_{i}"] = self.biases[i]
+            arrays[f"m_weights_{i}"] = self.m_weights[i]
+            arrays[f"v_weights_{i}"] = self.v_weights[i]
+            arrays[f"m_biases_{i}"] = self.m_biases[i]
+            arrays[f"v_biases_{i}"] = self.v_biases[i]
+
+        # Uncompressed so it can be memory-mapped, and written to a temporary
+        # file first so processes mapping the old checkpoint are not disturbed
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temp_path, path)
+
+    def forward(self, x):
+        # Tanh hidden layers, softmax output; returns every layer's activations
+        activations = [x]
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            z = activations[-1] @ w + b
+            if i < len(self.weights) - 1:
+                activations.append(np.tanh(z))
+            else:
+                z = z - z.max(axis=1, keepdims=True)
+                exp = np.exp(z)
+                activations.append(exp / exp.sum(axis=1, keepdims=True))
+        return activations
+
+    def train_step(self, x, y):
+        activations = self.forward(x)
+        probs = activations[-1]
+
+        rows = np.arange(len(y))
+        self.loss = float(-np.log(probs[rows, y] + 1e-7).mean())
+        self.accuracy = float((probs.argmax(axis=1) == y).mean())
+
+        # Backpropagate the softmax cross-entropy gradient
+        delta = probs.copy()
+        delta[rows, y] -= 1
+        delta /= len(y)
+        self.step += 1
+        for i in range(len(self.weights) - 1, -1, -1):
+            grad_w = activations[i].T @ delta
+            grad_b = delta.sum(axis=0)
+            if i > 0:
+                delta = (delta @ self.weights[i].T) * (1 - activations[i] ** 2)
+            self.gradients[i] = grad_w
+            self.adam_update(i, grad_w, grad_b)
+
+    def adam_update(self, i, grad_w, grad_b, beta1=0.9, beta2=0.999, eps=1e-8):
+        correction1 = 1 - beta1**self.step
+        correction2 = 1 - beta2**self.step
+        for param, m, v, grad in (
+            (self.weights[i], self.m_weights[i], self.v_weights[i], grad_w),
+            (self.biases[i], self.m_biases[i], self.v_biases[i], grad_b),
+        ):
+            m *= beta1
+            m += (1 - beta1) * grad
+            v *= beta2
+            v += (1 - beta2) * grad * grad
+            param -= (
+                LEARNING_RATE * (m / correction1) / (np.sqrt(v / correction2) + eps)
+            )
+
+    def train_for(self, budget_ms, stream):
+        # Run as many steps as fit in the time budget, independent of frame rate
+        start = time.perf_counter()
+        deadline = start + budget_ms / 1000
+        steps = 0
+        total_loss = 0.0
+        now = start
+        while now < deadline:
+            x, y = stream.take(BATCH_SIZE)
+            if not len(x):
+                # Starved: the input stream cannot keep up
+                break
+            self.train_step(x, y)
+            steps += 1
+            total_loss += self.loss
+            now = time.perf_counter()
+
+        rate = steps / max(now - start, 1e-6)
+        self.steps_per_second += (rate - self.steps_per_second) * 0.1
+        if steps:
+            self.loss_history.append(total_loss / steps)
+
+    def sample_activations(self, sample):
+        # Activations of a single sample, rescaled to 0..1 for display
+        activations = self.forward(sample[None, :])
+        display = [np.clip((activations[0][0] + 1) * 0.5, 0, 1)]
+        display.extend((a[0] + 1) * 0.5 for a in activations[1:-1])
+        display.append(activations[-1][0])
+        return display
+
+
+# Fonts and rendered static text come from the shared textCache module
+ACTIVATION_LABELS = []
+
+
+def get_font(size, name="Arial"):
+    return textCache.get_font(size, name)
+
+
+def render_text(text, size, color=TEXT_COLOR):
+    # Only for strings drawn repeatedly; the shared cache is a bounded LRU
+    return textCache.render_text(get_font(size), text, color)
+
+
+def activation_label(activation):
+    # Pre-rendered "0.0" to "1.0" labels, one per possible one-decimal value
+    if not ACTIVATION_LABELS:
+        font = get_font(10)
+        ACTIVATION_LABELS.extend(
+            font.render(f"{i / 10:.1f}", True, TEXT_COLOR) for i in range(11)
+        )
+    return ACTIVATION_LABELS[min(10, max(0, round(activation * 10)))]
+
+
+# Edge colors for each quantized activity level
+EDGE_PALETTE = [
+    (
+        int(EDGE_COLOR[0] * (1 - activity)),
+        int(EDGE_COLOR[1] * (1 - activity) + activity * 255),
+        int(EDGE_COLOR[2] * (1 - activity)),
+    )
+    for activity in np.linspace(0, 1, EDGE_COLOR_LEVELS)
+]
 
 
 class Neuron:
-    def __init__(self, x, y, layer_type):
+    def __init__(self, x, y, layer_type, radius=15):
         self.x = x
         self.y = y
-        self.radius = 15
+        self.radius = radius
         self.layer_type = layer_type
         self.activation = random.random()
         self.target_activation = random.random()
@@ -40,10 +445,6 @@ class Neuron:
         # Smoothly transition activation level
         self.activation += (self.target_activation - self.activation) * 0.05
 
-        # Occasionally change target activation for animation
-        if random.random() < 0.02:
-            self.target_activation = random.random()
-
     def draw(self, screen):
         # Draw neuron
         intensity = int(155 + 100 * self.activation)
@@ -55,18 +456,33 @@ class Neuron:
         gfxdraw.filled_circle(screen, int(self.x), int(self.y), self.radius, color)
         gfxdraw.aacircle(screen, int(self.x), int(self.y), self.radius, HIGHLIGHT_COLOR)
 
-        # Draw activation level inside neuron
-        font = pygame.font.SysFont("Arial", 10)
-        text = font.render(f"{self.activation:.1f}", True, TEXT_COLOR)
+        # Draw activation level inside neuron (skipped when neurons are tiny)
+        if self.radius < 10:
+            return
+        text = activation_label(self.activation)
         screen.blit(
             text, (self.x - text.get_width() // 2, self.y - text.get_height() // 2)
         )
 
 
 class NeuralNetwork:
-    def __init__(self):
+    def __init__(self, trainer=None):
         self.neurons = []
-        self.connections = []
+        self.layers = []
+        self.rng = np.random.default_rng()
+        self.trainer = trainer or Trainer(LAYER_SIZES)
+        self.stream = DataStream(
+            make_chunks(
+                STREAM_SOURCE, self.trainer.layer_sizes[0], self.trainer.layer_sizes[-1]
+            ),
+            self.trainer.layer_sizes[0],
+        )
+        self.pulse_sprite = pygame.Surface(
+            (PULSE_RADIUS * 2 + 1, PULSE_RADIUS * 2 + 1), pygame.SRCALPHA
+        )
+        gfxdraw.filled_circle(
+            self.pulse_sprite, PULSE_RADIUS, PULSE_RADIUS, PULSE_RADIUS, HIGHLIGHT_COLOR
+        )
         self.setup_network()
         self.thought_bubbles = []
         self.messages = [
@@ -86,70 +502,192 @@ class NeuralNetwork:
 
     def generate_data_points(self):
         points = []
-        for _ in range(20):
-            x = random.randint(50, WIDTH - 50)
-            y = random.randint(HEIGHT - 200, HEIGHT - 50)
-            color = (
-                random.randint(40, 100),
-                random.randint(150, 255),
-                random.randint(100, 150),
-            )
-            speed = random.uniform(0.5, 2.0)
-            points.append({"x": x, "y": y, "color": color, "speed": speed})
+        for _ in range(DATA_POINTS):
+            point = {"x": 0, "y": 0, "sample": None, "label": 0}
+            self.recycle_data_point(point)
+            point["y"] = random.randint(HEIGHT - 200, HEIGHT - 50)
+            points.append(point)
         return points
 
+    def recycle_data_point(self, point):
+        # Each data point carries a real sample from the stream to the input layer
+        point["x"] = random.randint(50, WIDTH - 50)
+        point["y"] = HEIGHT
+        point["speed"] = random.uniform(0.5, 2.0)
+        point["target_y"] = random.choice(self.layers[0]["node_y"].tolist())
+        features, labels = self.stream.take(1)
+        if len(features):
+            point["sample"], point["label"] = features[0], int(labels[0])
+        else:
+            # Starved stream: a plain point, colored as class 0
+            point["sample"], point["label"] = None, 0
+
+        # Color by class label, kept within the green palette
+        shade = point["label"] / max(1, self.trainer.layer_sizes[-1] - 1)
+        point["color"] = (
+            int(40 + 60 * shade),
+            int(255 - 105 * shade),
+            int(100 + 50 * shade),
+        )
+
+    def feed_sample(self, sample):
+        # Drive neuron activations from a real forward pass, averaged per group
+        activations = self.trainer.sample_activations(sample)
+        for layer, values in zip(self.layers, activations):
+            bounds = layer["bounds"]
+            means = np.add.reduceat(values, bounds[:-1]) / np.diff(bounds)
+            first = layer["first"]
+            for neuron, activation in zip(
+                self.neurons[first : first + len(means)], means.tolist()
+            ):
+                neuron.target_activation = activation
+
+    def close(self):
+        self.stream.close()
+
     def setup_network(self):
         # Create neurons for each layer
-        # Input layer
-        for i in range(INPUT_NEURONS):
-            x = 200
-            y = 300 + i * (400 / (INPUT_NEURONS - 1))
-            self.neurons.append(Neuron(x, y, "input"))
-
-        # Hidden layer
-        for i in range(HIDDEN_NEURONS):
-            x = 500
-            y = 250 + i * (500 / (HIDDEN_NEURONS - 1))
-            self.neurons.append(Neuron(x, y, "hidden"))
-
-        # Output layer
-        for i in range(OUTPUT_NEURONS):
-            x = 800
-            y = 300 + i * (400 / (OUTPUT_NEURONS - 1))
-            self.neurons.append(Neuron(x, y, "output"))
-
-        # Create connections
-        # Input to hidden
-        for i in range(INPUT_NEURONS):
-            for j in range(HIDDEN_NEURONS):
-                weight = random.uniform(0.1, 0.9)
-                self.connections.append(
-                    {"from": i, "to": INPUT_NEURONS + j, "weight": weight}
-                )
+        layer_sizes = self.trainer.layer_sizes
+        layer_xs = np.linspace(200, 800, len(layer_sizes))
+        for index, (size, x) in enumerate(zip(layer_sizes, layer_xs)):
+            if index == 0:
+                layer_type, label = "input", "Input Layer"
+            elif index == len(layer_sizes) - 1:
+                layer_type, label = "output", "Output Layer"
+            else:
+                layer_type = "hidden"
+                label = "Hidden Layer" if len(layer_sizes) == 3 else f"Hidden {index}"
+
+            # Large layers are shown as groups of consecutive units
+            groups = min(size, MAX_VISIBLE_NEURONS)
+            bounds = np.linspace(0, size, groups + 1).astype(np.int64)
+            if groups < size:
+                label += f" ({size})"
+
+            span = 500 if layer_type == "hidden" else 400
+            top = 500 - span / 2
+            if groups > 1:
+                node_y = top + np.arange(groups) * (span / (groups - 1))
+            else:
+                node_y = np.array([500.0])
+            radius = int(max(3, min(15, span / max(1, groups - 1) * 0.4)))
 
-        # Hidden to output
-        for i in range(HIDDEN_NEURONS):
-            for j in range(OUTPUT_NEURONS):
-                weight = random.uniform(0.1, 0.9)
-                self.connections.append(
-                    {
-                        "from": INPUT_NEURONS + i,
-                        "to": INPUT_NEURONS + HIDDEN_NEURONS + j,
-                        "weight": weight,
-                    }
+            # Every unit gets a position so subsampled edges can reach it
+            group_centers = (bounds[:-1] + bounds[1:] - 1) / 2
+            unit_y = np.interp(np.arange(size), group_centers, node_y)
+
+            self.layers.append(
+                {
+                    "x": x,
+                    "size": size,
+                    "bounds": bounds,
+                    "first": len(self.neurons),
+                    "node_y": node_y,
+                    "unit_y": unit_y,
+                    "label": label,
+                    "label_y": top - 50,
+                }
+            )
+            for y in node_y:
+                self.neurons.append(Neuron(x, y, layer_type, radius))
+
+        # Create connections between each pair of layers
+        self.edge_pairs = []
+        sources, targets, starts, ends = [], [], [], []
+        for a, b in zip(self.layers[:-1], self.layers[1:]):
+            groups_in, groups_out = len(a["node_y"]), len(b["node_y"])
+            n_edges = a["size"] * b["size"]
+            pair = {}
+            if n_edges <= EDGE_DENSITY_THRESHOLD and groups_in * groups_out == n_edges:
+                pair["mode"] = "exact"
+                pair["flat"] = np.arange(n_edges)
+            elif EDGE_LOD == "subsample":
+                pair["mode"] = "subsample"
+                pair["flat"] = np.sort(
+                    self.trainer.rng.choice(
+                        n_edges, min(n_edges, EDGE_DENSITY_THRESHOLD), replace=False
+                    )
+                )
+            else:
+                # Bundle every block of edges between two neuron groups into one
+                pair["mode"] = "bundle"
+                pair["block_sizes"] = np.outer(
+                    np.diff(a["bounds"]), np.diff(b["bounds"])
                 )
 
+            if pair["mode"] == "bundle":
+                i, j = np.divmod(np.arange(groups_in * groups_out), groups_out)
+                src_y, dst_y = a["node_y"][i], b["node_y"][j]
+                src_node, dst_node = i, j
+            else:
+                i, j = np.divmod(pair["flat"], b["size"])
+                src_y, dst_y = a["unit_y"][i], b["unit_y"][j]
+                src_node = np.searchsorted(a["bounds"], i, side="right") - 1
+                dst_node = np.searchsorted(b["bounds"], j, side="right") - 1
+
+            sources.append(a["first"] + src_node)
+            targets.append(b["first"] + dst_node)
+            starts.append(np.stack([np.full(len(i), a["x"]), src_y], axis=1))
+            ends.append(np.stack([np.full(len(j), b["x"]), dst_y], axis=1))
+            self.edge_pairs.append(pair)
+
+        # Connections are stored as parallel arrays, one entry per drawn edge
+        self.edge_src = np.concatenate(sources).astype(np.int32)
+        self.edge_dst = np.concatenate(targets).astype(np.int32)
+        self.edge_weight = np.zeros(len(self.edge_src), dtype=np.float32)
+        self.edge_grad = np.zeros(len(self.edge_src), dtype=np.float32)
+        self.edge_activity = np.zeros(len(self.edge_src), dtype=np.float32)
+
+        # Precomputed endpoints for batched drawing
+        self.edge_start = np.concatenate(starts).astype(np.float32)
+        self.edge_end = np.concatenate(ends).astype(np.float32)
+        self.edge_layer = None
+        self.edge_layer_widths = None
+        self.sync_weights()
+
+    def edge_values(self, matrix, layer):
+        # Normalized magnitude of a weight or gradient matrix for each drawn edge
+        pair = self.edge_pairs[layer]
+        values = np.abs(matrix)
+        if pair["mode"] == "bundle":
+            rows = self.layers[layer]["bounds"][:-1]
+            columns = self.layers[layer + 1]["bounds"][:-1]
+            values = np.add.reduceat(
+                np.add.reduceat(values, rows, axis=0), columns, axis=1
+            )
+            values = (values / pair["block_sizes"]).ravel()
+        else:
+            values = values.ravel()[pair["flat"]]
+        return values / (values.max() + 1e-6)
+
+    def sync_weights(self):
+        # Map the trained weights and their gradients onto the drawn connections
+        self.edge_weight[:] = np.concatenate(
+            [self.edge_values(w, k) for k, w in enumerate(self.trainer.weights)]
+        )
+        self.edge_grad[:] = np.concatenate(
+            [self.edge_values(g, k) for k, g in enumerate(self.trainer.gradients)]
+        )
+
     def update(self):
+        # Train for a fixed time budget, then mirror the result on screen
+        if not self.trainer.frozen:
+            with profiler.probe("training"):
+                self.trainer.train_for(TRAIN_BUDGET_MS, self.stream)
+        self.stream.update_rate()
+        with profiler.probe("sync"):
+            self.sync_weights()
+
         # Update neurons
         for neuron in self.neurons:
             neuron.update()
 
-        # Update connections (pulse animation)
-        for conn in self.connections:
-            if random.random() < 0.01:
-                conn["active"] = 1.0
-            else:
-                conn["active"] = conn.get("active", 0) * 0.95
+        # Update connections (pulse animation, stronger gradients fire more often)
+        # Large networks fire proportionally less so pulses stay readable
+        fire_scale = min(1.0, MAX_PULSING_EDGES / len(self.edge_activity))
+        fire_chance = (0.01 + 0.05 * self.edge_grad) * fire_scale
+        self.edge_activity *= 0.95
+        self.edge_activity[self.rng.random(len(fire_chance)) < fire_chance] = 1.0
 
         # Update thought bubbles
         self.thought_timer += 1
@@ -181,66 +719,103 @@ class NeuralNetwork:
             self.current_message = random.choice(self.messages)
 
         # Update data points
+        # Data points rise toward the input layer and are fed in on arrival
+        input_x = self.layers[0]["x"]
         for point in self.data_points:
-            point["y"] -= point["speed"]
-            if point["y"] < 0:
-                point["y"] = HEIGHT
-                point["x"] = random.randint(50, WIDTH - 50)
+            dx = input_x - point["x"]
+            dy = point["target_y"] - point["y"]
+            distance = math.hypot(dx, dy)
+            if distance <= point["speed"]:
+                if point["sample"] is not None:
+                    self.feed_sample(point["sample"])
+                self.recycle_data_point(point)
+            else:
+                point["x"] += dx / distance * point["speed"]
+                point["y"] += dy / distance * point["speed"]
+
+    def render_edge_layer(self, size, widths):
+        # Every edge at rest, drawn once onto a colorkeyed layer, wider edges on top
+        layer = pygame.Surface(size)
+        layer.fill(EDGE_LAYER_KEY)
+        layer.set_colorkey(EDGE_LAYER_KEY, pygame.RLEACCEL)
+        order = np.argsort(widths, kind="stable")
+        starts = self.edge_start[order].tolist()
+        ends = self.edge_end[order].tolist()
+        draw_line = pygame.draw.line
+        for start, end, width in zip(starts, ends, widths[order].tolist()):
+            draw_line(layer, EDGE_PALETTE[0], start, end, width)
+        return layer
+
+    def draw_connections(self, screen):
+        weight = self.edge_weight
+        activity = self.edge_activity
+
+        # Quantize color and width so edges can be drawn bucket by bucket
+        level = np.rint(activity * (EDGE_COLOR_LEVELS - 1)).astype(np.int64)
+
+        # Edges at rest come from a cached layer, redrawn only when training
+        # moves a weight well past a width step; the slack keeps weights that
+        # hover at a step from redrawing it every frame. Below the firing cap
+        # most edges are lit anyway, so small networks draw every edge directly
+        scaled = 1 + 3 * weight
+        if len(activity) <= MAX_PULSING_EDGES:
+            rest_width = scaled.astype(np.int64)
+            lit = np.arange(len(activity))
+        else:
+            rest_width = self.edge_layer_widths
+            if rest_width is None or np.any(
+                (scaled < rest_width - EDGE_WIDTH_SLACK)
+                | (scaled >= rest_width + 1 + EDGE_WIDTH_SLACK)
+            ):
+                rest_width = scaled.astype(np.int64)
+                self.edge_layer = self.render_edge_layer(screen.get_size(), rest_width)
+                self.edge_layer_widths = rest_width
+            screen.blit(self.edge_layer, (0, 0))
+            # Lit edges on top; firing is capped, so there are a few hundred
+            lit = np.flatnonzero(level)
+
+        keys = level[lit] * 8 + rest_width[lit] + 2 * (activity[lit] > 0.1)
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        splits = (np.flatnonzero(np.diff(keys)) + 1).tolist()
+        starts = self.edge_start[lit[order]].tolist()
+        ends = self.edge_end[lit[order]].tolist()
+
+        draw_line = pygame.draw.line
+        for lo, hi in zip([0] + splits, splits + [len(keys)]):
+            if lo == hi:
+                continue
+            color = EDGE_PALETTE[keys[lo] // 8]
+            line_width = int(keys[lo] % 8)
+            for start, end in zip(starts[lo:hi], ends[lo:hi]):
+                draw_line(screen, color, start, end, line_width)
+
+        # Draw data pulses traveling along active connections in one batch
+        active = np.flatnonzero(activity > 0.1)
+        progress = (1 - activity[active])[:, None]
+        pulses = (
+            self.edge_start[active]
+            + (self.edge_end[active] - self.edge_start[active]) * progress
+            - PULSE_RADIUS
+        )
+        screen.blits(
+            [(self.pulse_sprite, pos) for pos in pulses.astype(np.int64).tolist()],
+            doreturn=False,
+        )
 
     def draw(self, screen):
         # Draw connections
-        for conn in self.connections:
-            start_neuron = self.neurons[conn["from"]]
-            end_neuron = self.neurons[conn["to"]]
-
-            # Calculate connection color based on weight and activity
-            activity = conn.get("active", 0)
-            color = (
-                int(EDGE_COLOR[0] * (1 - activity)),
-                int(EDGE_COLOR[1] * (1 - activity) + activity * 255),
-                int(EDGE_COLOR[2] * (1 - activity)),
-            )
-
-            width = 1 + int(3 * conn["weight"])
-            if activity > 0.1:
-                width += 2
-
-            pygame.draw.line(
-                screen,
-                color,
-                (start_neuron.x, start_neuron.y),
-                (end_neuron.x, end_neuron.y),
-                width,
-            )
-
-            # Draw data pulse traveling along active connections
-            if activity > 0.1:
-                pulse_pos = activity
-                pulse_x = start_neuron.x + (end_neuron.x - start_neuron.x) * (
-                    1 - pulse_pos
-                )
-                pulse_y = start_neuron.y + (end_neuron.y - start_neuron.y) * (
-                    1 - pulse_pos
-                )
-
-                pulse_radius = 5
-                gfxdraw.filled_circle(
-                    screen, int(pulse_x), int(pulse_y), pulse_radius, HIGHLIGHT_COLOR
-                )
+        with profiler.probe("connections"):
+            self.draw_connections(screen)
 
         # Draw neurons
         for neuron in self.neurons:
             neuron.draw(screen)
 
         # Draw layer labels
-        font = pygame.font.SysFont("Arial", 20)
-        input_text = font.render("Input Layer", True, TEXT_COLOR)
-        hidden_text = font.render("Hidden Layer", True, TEXT_COLOR)
-        output_text = font.render("Output Layer", True, TEXT_COLOR)
-
-        screen.blit(input_text, (200 - input_text.get_width() // 2, 250))
-        screen.blit(hidden_text, (500 - hidden_text.get_width() // 2, 200))
-        screen.blit(output_text, (800 - output_text.get_width() // 2, 250))
+        for layer in self.layers:
+            text = render_text(layer["label"], 20)
+            screen.blit(text, (layer["x"] - text.get_width() // 2, layer["label_y"]))
 
         # Draw data points
         for point in self.data_points:
@@ -253,54 +828,117 @@ class NeuralNetwork:
 
         # Draw thought bubbles
         for bubble in self.thought_bubbles:
-            font = pygame.font.SysFont("Arial", bubble["size"])
-            text = font.render(bubble["text"], True, (180, 255, 200, bubble["opacity"]))
+            # Fade a copy; the cached surface is shared with other callers
+            text = render_text(bubble["text"], bubble["size"]).copy()
             text.set_alpha(bubble["opacity"])
             screen.blit(text, (bubble["x"], bubble["y"]))
 
         # Draw title
-        title_font = pygame.font.SysFont("Arial", 36)
-        title = title_font.render("AI Neural Network Visualization", True, TEXT_COLOR)
+        title = render_text("AI Neural Network Visualization", 36)
         screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 50))
 
         # Draw processing message
-        message_font = pygame.font.SysFont("Arial", 24)
-        message = message_font.render(self.current_message, True, TEXT_COLOR)
+        message = render_text(self.current_message, 24)
         screen.blit(message, (WIDTH // 2 - message.get_width() // 2, 100))
 
         # Draw LLM status in bottom corner
-        llm_font = pygame.font.SysFont("Arial", 16)
-        llm_status = llm_font.render(
-            "LLM Status: Active | AGI Development: In Progress", True, TEXT_COLOR
+        llm_status = render_text(
+            "LLM Status: Active | AGI Development: In Progress", 16
         )
         screen.blit(llm_status, (20, HEIGHT - 30))
 
+        self.draw_training_hud(screen)
+
+    def draw_training_hud(self, screen):
+        # Loss curve and training throughput
+        hud_rect = pygame.Rect(WIDTH - 320, HEIGHT - 170, 300, 120)
+        pygame.draw.rect(screen, BACKGROUND, hud_rect)
+        pygame.draw.rect(screen, EDGE_COLOR, hud_rect, 1)
+
+        history = self.trainer.loss_history
+        if len(history) > 1:
+            max_loss = max(history) + 1e-6
+            points = [
+                (
+                    hud_rect.x + 5 + (hud_rect.width - 10) * i / (LOSS_HISTORY - 1),
+                    hud_rect.bottom - 5 - (hud_rect.height - 50) * loss / max_loss,
+                )
+                for i, loss in enumerate(history)
+            ]
+            pygame.draw.lines(screen, NODE_COLOR, False, points, 2)
+
+        stats = get_font(14).render(
+            f"Loss: {self.trainer.loss:.3f} | Acc: {self.trainer.accuracy:.0%} | "
+            f"{self.trainer.steps_per_second:,.0f} steps/s",
+            True,
+            TEXT_COLOR,
+        )
+        screen.blit(stats, (hud_rect.x + 5, hud_rect.y + 5))
+
+        # A low buffer means training waits on input, a full one means on compute
+        stream_stats = get_font(14).render(
+            f"Stream: {self.stream.samples_per_second:,.0f} samples/s | "
+            f"Buffer: {self.stream.fill_level():.0%}",
+            True,
+            TEXT_COLOR,
+        )
+        screen.blit(stream_stats, (hud_rect.x + 5, hud_rect.y + 22))
+
 
-def main():
+def main(checkpoint=None, read_only=False):
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("AI Neural Network Visualization")
     clock = pygame.time.Clock()
 
-    neural_network = NeuralNetwork()
+    # S and L both use the checkpoint that was loaded, or the default one
+    checkpoint_path = checkpoint or CHECKPOINT_PATH
+    if checkpoint:
+        neural_network = NeuralNetwork(Trainer.from_checkpoint(checkpoint, read_only))
+    else:
+        neural_network = NeuralNetwork()
 
     running = True
     while running:
         for event in pygame.event.get():
+            if profiler.handle_event(event):
+                continue
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.KEYDOWN:
+                # S saves a checkpoint, L reloads it and rebuilds the layout
+                if event.key == pygame.K_s:
+                    if read_only:
+                        # The file is mapped, and replacing it fails on Windows
+                        print(f"--view: not saving over {checkpoint_path}")
+                    else:
+                        neural_network.trainer.save_checkpoint(checkpoint_path)
+                elif event.key == pygame.K_l and os.path.exists(checkpoint_path):
+                    neural_network.close()
+                    neural_network = NeuralNetwork(
+                        Trainer.from_checkpoint(checkpoint_path, read_only)
+                    )
 
         # Update
-        neural_network.update()
+        with profiler.probe("update"):
+            neural_network.update()
 
         # Draw
-        screen.fill(BACKGROUND)
-        neural_network.draw(screen)
-
-        pygame.display.flip()
+        with profiler.probe("draw"):
+            screen.fill(BACKGROUND)
+            neural_network.draw(screen)
+        profiler.draw(screen)
+
+        with profiler.probe("flip"):
+            pygame.display.flip()
+        profiler.end_frame()
         clock.tick(FPS)
 
-    pygame.quit()
+    neural_network.close()
 
 
 if __name__ == "__main__":
-    main()
+    # Usage: neuralNet.py [checkpoint.npz] [--view]
+    # --view maps the checkpoint read-only and shows it without training
+    args = [arg for arg in sys.argv[1:] if arg != "--view"]
+    main(args[0] if args else None, read_only="--view" in sys.argv)
+    pygame.quit()
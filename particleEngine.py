@@ -0,0 +1,373 @@
+import pygame
+from pygame import gfxdraw
+import numpy as np
+
+# Shared particle engine for the voice visualizers (AIVoice*.py): pooled
+# structure-of-arrays storage, vectorized behaviors and batched sprite drawing.
+# Every behavior works in frames: dt=1 is one 60 FPS frame.
+
+
+class ArrayPool:
+    # Structure-of-arrays storage: one row per field, live entries packed first
+    def __init__(self, fields, capacity=64):
+        self.fields = {name: i for i, name in enumerate(fields)}
+        self.data = np.zeros((len(fields), capacity), dtype=np.float32)
+        self.count = 0
+
+    def __getitem__(self, name):
+        return self.data[self.fields[name], : self.count]
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, n, **columns):
+        # Columns are arrays or scalars; fields not given start at 0, unknown ones
+        # are ignored
+        if self.count + n > self.data.shape[1]:
+            capacity = max(self.count + n, self.data.shape[1] * 2)
+            grown = np.zeros((len(self.fields), capacity), dtype=np.float32)
+            grown[:, : self.count] = self.data[:, : self.count]
+            self.data = grown
+        new = slice(self.count, self.count + n)
+        self.data[:, new] = 0
+        for name, values in columns.items():
+            if name in self.fields:
+                self.data[self.fields[name], new] = values
+        self.count += n
+
+    def remove(self, dead):
+        # Swap-remove: survivors past the new end move into the holes below it
+        dead = np.flatnonzero(dead)
+        if not len(dead):
+            return 0
+        new_count = self.count - len(dead)
+        holes = dead[dead < new_count]
+        tail = np.ones(self.count - new_count, dtype=bool)
+        tail[dead[dead >= new_count] - new_count] = False
+        self.data[:, holes] = self.data[:, new_count + np.flatnonzero(tail)]
+        self.count = new_count
+        return len(dead)
+
+
+# Emitters
+
+
+class Emitter:
+    # Each keyword is a field sampler, evaluated in order for every batch:
+    #   constant         -> same value for every particle
+    #   (low, high)      -> uniform random range
+    #   callable(cols)   -> computed from the columns sampled before it
+    # Columns the system doesn't store (e.g. an angle used for targets) are scratch.
+    def __init__(self, rng=None, **samplers):
+        self.rng = rng or np.random.default_rng()
+        self.samplers = samplers
+
+    def sample(self, count):
+        columns = {}
+        for name, sampler in self.samplers.items():
+            if callable(sampler):
+                value = sampler(columns)
+            elif isinstance(sampler, tuple):
+                value = self.rng.uniform(sampler[0], sampler[1], count)
+            else:
+                value = sampler
+            columns[name] = value
+        return columns
+
+
+# Behaviors: called as behavior(pool, dt); may return a mask of particles to kill
+
+
+class SeekTarget:
+    # Ease toward (target_x, target_y) by speed * rate of the remaining distance
+    fields = ("x", "y", "target_x", "target_y", "speed")
+
+    def __init__(self, rate):
+        self.rate = rate
+
+    def __call__(self, pool, dt):
+        step = pool["speed"] * (self.rate * dt)
+        x, y = pool["x"], pool["y"]
+        x += (pool["target_x"] - x) * step
+        y += (pool["target_y"] - y) * step
+
+
+class Drift:
+    # Constant velocity
+    fields = ("x", "y", "vx", "vy")
+
+    def __call__(self, pool, dt):
+        x, y = pool["x"], pool["y"]
+        x += pool["vx"] * dt
+        y += pool["vy"] * dt
+
+
+class Orbit:
+    # Drift along a heading that turns by speed * turn each frame
+    fields = ("x", "y", "angle", "drift", "speed")
+
+    def __init__(self, turn):
+        self.turn = turn
+
+    def __call__(self, pool, dt):
+        x, y, angle = pool["x"], pool["y"], pool["angle"]
+        x += np.cos(angle) * pool["drift"] * dt
+        y += np.sin(angle) * pool["drift"] * dt
+        angle += pool["speed"] * (self.turn * dt)
+
+
+class Expand:
+    # Grow the size (a ring's radius) by speed, dying at max_size
+    fields = ("size", "max_size", "speed")
+
+    def __call__(self, pool, dt):
+        size = pool["size"]
+        size += pool["speed"] * dt
+        return size >= pool["max_size"]
+
+
+# Lifetime curves
+
+
+class Age:
+    # Count age up to life, then die
+    fields = ("age", "life")
+
+    def __call__(self, pool, dt):
+        age = pool["age"]
+        age += dt
+        return age >= pool["life"]
+
+
+class FadeOut:
+    # Alpha falls linearly from start over the particle's life
+    fields = ("age", "life", "alpha")
+
+    def __init__(self, start=255):
+        self.start = start
+
+    def __call__(self, pool, dt):
+        # Past the end of life goes negative, but Age removes those this update
+        pool["alpha"][:] = self.start * (1 - pool["age"] / pool["life"])
+
+
+class FadeBySize:
+    # Alpha falls as the size approaches max_size (expanding rings)
+    fields = ("size", "max_size", "alpha")
+
+    def __call__(self, pool, dt):
+        pool["alpha"][:] = np.maximum(0, 255 * (1 - pool["size"] / pool["max_size"]))
+
+
+class FadeStep:
+    # Alpha drops by a fixed amount per frame, dying at zero
+    fields = ("alpha",)
+
+    def __init__(self, step):
+        self.step = step
+
+    def __call__(self, pool, dt):
+        alpha = pool["alpha"]
+        alpha -= self.step * dt
+        return alpha <= 0
+
+
+class Shrink:
+    # Size loses 1/life of itself per frame, dying below min_size
+    fields = ("size", "life")
+
+    def __init__(self, min_size=0.5):
+        self.min_size = min_size
+
+    def __call__(self, pool, dt):
+        size = pool["size"]
+        size -= size / pool["life"] * dt
+        return size <= self.min_size
+
+
+class GrowThenDecay:
+    # Grow by a factor until near max_size, then shrink and fade by decay
+    fields = ("size", "max_size", "alpha", "decay", "growing")
+
+    def __init__(self, grow=1.1, min_size=0.5, min_alpha=10):
+        self.grow = grow
+        self.min_size = min_size
+        self.min_alpha = min_alpha
+
+    def __call__(self, pool, dt):
+        size, alpha, max_size = pool["size"], pool["alpha"], pool["max_size"]
+        growing = pool["growing"] > 0
+        size[growing] = np.minimum(size[growing] * self.grow**dt, max_size[growing])
+        decay = pool["decay"][~growing] ** dt
+        size[~growing] *= decay
+        alpha[~growing] *= decay
+        pool["growing"][:] = growing & (size < max_size * 0.95)
+        return (size <= self.min_size) | (alpha <= self.min_alpha)
+
+
+class ParticleSystem:
+    def __init__(self, behaviors, renderer=None, extra_fields=(), capacity=64):
+        # Stored fields are whatever the behaviors and renderer read or write
+        fields = []
+        for part in (*behaviors, renderer):
+            for name in getattr(part, "fields", ()):
+                if name not in fields:
+                    fields.append(name)
+        fields.extend(name for name in extra_fields if name not in fields)
+        self.pool = ArrayPool(fields, capacity)
+        self.behaviors = behaviors
+        self.renderer = renderer
+
+    def __len__(self):
+        return len(self.pool)
+
+    def __getitem__(self, name):
+        return self.pool[name]
+
+    def emit(self, emitter, count):
+        if count > 0:
+            self.pool.spawn(count, **emitter.sample(count))
+
+    def update(self, dt=1.0):
+        # Returns how many particles died
+        if not len(self.pool):
+            return 0
+        dead = None
+        for behavior in self.behaviors:
+            killed = behavior(self.pool, dt)
+            if killed is not None:
+                dead = killed if dead is None else dead | killed
+        return 0 if dead is None else self.pool.remove(dead)
+
+    def draw(self, surface):
+        return self.renderer.draw(surface, self.pool)
+
+
+# Rendering
+
+
+def matte_sprite(size, draw):
+    # Render on black and on white; the difference recovers per-pixel alpha,
+    # so antialiased, translucent strokes survive the trip into a sprite
+    layers = []
+    for background in ((0, 0, 0), (255, 255, 255)):
+        layer = pygame.Surface((size, size))
+        layer.fill(background)
+        draw(layer)
+        layers.append(pygame.surfarray.array3d(layer).astype(np.float32))
+    black, white = layers
+    alpha = 255 - (white - black).mean(axis=2)
+    color = black * 255 / np.maximum(alpha, 1)[..., None]
+
+    sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+    pygame.surfarray.pixels3d(sprite)[...] = np.clip(color, 0, 255)
+    pygame.surfarray.pixels_alpha(sprite)[...] = np.clip(alpha, 0, 255)
+    return sprite
+
+
+# Sprite styles: draw(surface, center, radius, color, alpha) onto an opaque layer
+
+
+def circle_style(surface, center, radius, color, alpha):
+    # pygame.draw ignores alpha on opaque surfaces, so blend through a layer
+    disc = pygame.Surface(surface.get_size(), pygame.SRCALPHA)
+    pygame.draw.circle(disc, (*color, alpha), center, radius)
+    surface.blit(disc, (0, 0))
+
+
+def disc_style(surface, center, radius, color, alpha):
+    gfxdraw.filled_circle(surface, center[0], center[1], radius, (*color, alpha))
+
+
+def ringed_disc_style(surface, center, radius, color, alpha):
+    # Translucent disc with an opaque antialiased rim
+    gfxdraw.filled_circle(surface, center[0], center[1], radius, (*color, alpha))
+    gfxdraw.aacircle(surface, center[0], center[1], radius, (*color, 255))
+
+
+class SpriteRenderer:
+    # Pre-rendered sprites per (palette color, integer radius, alpha level)
+    fields = ("x", "y", "size", "alpha", "color")
+
+    def __init__(
+        self, palette, style=disc_style, alpha_levels=16, max_radius=32, min_radius=1
+    ):
+        self.palette = [tuple(color) for color in palette]
+        self.style = style
+        self.alpha_levels = alpha_levels
+        self.max_radius = max_radius
+        self.min_radius = min_radius
+        count = len(self.palette) * (max_radius + 1) * alpha_levels
+        self.sprites = [None] * count
+        self.built = np.zeros(count, dtype=bool)
+
+    def build(self, key):
+        rest, level = divmod(key, self.alpha_levels)
+        color, radius = divmod(rest, self.max_radius + 1)
+        alpha = round(level * 255 / (self.alpha_levels - 1))
+        center = (radius + 1, radius + 1)
+        self.sprites[key] = matte_sprite(
+            2 * radius + 3,
+            lambda layer: self.style(layer, center, radius, self.palette[color], alpha),
+        )
+        self.built[key] = True
+
+    def draw_arrays(self, surface, x, y, radius, alpha, color):
+        # Radii truncate to whole pixels; returns the bounding rect drawn, or None
+        radius = np.minimum(
+            np.maximum(radius.astype(np.intp), self.min_radius), self.max_radius
+        )
+        level = np.rint(np.minimum(alpha, 255) * ((self.alpha_levels - 1) / 255))
+        level = level.astype(np.intp)
+        visible = level > 0  # Also drops anything faded below zero
+        if not visible.any():
+            return None
+        radius = radius[visible]
+        keys = (
+            color[visible].astype(np.intp) * (self.max_radius + 1) + radius
+        ) * self.alpha_levels + level[visible]
+        missing = keys[~self.built[keys]]
+        if len(missing):
+            for key in np.unique(missing).tolist():
+                self.build(key)
+
+        xs = x[visible].astype(np.intp) - radius - 1
+        ys = y[visible].astype(np.intp) - radius - 1
+        surface.blits(
+            zip(
+                map(self.sprites.__getitem__, keys.tolist()),
+                zip(xs.tolist(), ys.tolist()),
+            ),
+            doreturn=False,
+        )
+        left, top = int(xs.min()), int(ys.min())
+        right = int((xs + 2 * radius + 3).max())
+        bottom = int((ys + 2 * radius + 3).max())
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def draw(self, surface, pool):
+        if not len(pool):
+            return None
+        return self.draw_arrays(
+            surface, pool["x"], pool["y"], pool["size"], pool["alpha"], pool["color"]
+        )
+
+
+class RingRenderer:
+    # Antialiased circle outlines of radius size, one call per ring
+    fields = ("x", "y", "size", "alpha")
+
+    def __init__(self, color):
+        self.color = tuple(color)
+
+    def draw(self, surface, pool):
+        for x, y, radius, alpha in zip(
+            pool["x"].tolist(),
+            pool["y"].tolist(),
+            pool["size"].tolist(),
+            pool["alpha"].tolist(),
+        ):
+            if alpha > 0:
+                gfxdraw.aacircle(
+                    surface, int(x), int(y), int(radius), (*self.color, int(alpha))
+                )
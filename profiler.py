@@ -0,0 +1,171 @@
+import collections
+import time
+import pygame
+
+# Shared profiling HUD for every visualizer, toggled with F3. Code marks stages
+# with `with profiler.probe("draw"):`; the HUD shows a rolling frame-time graph
+# and the average and worst time of each stage. Probes nest, so a stage inside
+# another is counted in both. While the HUD is off, probe() hands back one
+# shared do-nothing context manager and nothing is timed.
+TOGGLE_KEY = pygame.K_F3
+HISTORY = 120  # Frames kept for the graph and the per-stage figures
+TEXT_REFRESH = 15  # Frames between updates of the HUD text
+GRAPH_HEIGHT = 60
+BAR_WIDTH = 2  # Graph pixels per frame
+PADDING = 6
+PANEL_COLOR = (0, 0, 0)
+BORDER_COLOR = (0, 120, 0)
+TEXT_COLOR = (180, 255, 180)
+GRAPH_COLOR = (0, 220, 0)
+SLOW_COLOR = (255, 80, 80)
+TARGET_COLOR = (90, 90, 0)
+
+enabled = False
+frame_times = collections.deque(maxlen=HISTORY)
+stage_times = {}  # Stage name -> deque of its total ms in each recent frame
+current = collections.defaultdict(float)  # Stage totals for the frame in progress
+state = {"last_frame": None, "text": [], "refresh": 0}
+
+
+class NullProbe:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_PROBE = NullProbe()
+
+
+class Probe:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        current[self.name] += (time.perf_counter() - self.start) * 1000
+        return False
+
+
+def probe(name):
+    return Probe(name) if enabled else NULL_PROBE
+
+
+def toggle():
+    # History from before the HUD was hidden would skew the figures, so drop it
+    global enabled
+    enabled = not enabled
+    frame_times.clear()
+    stage_times.clear()
+    current.clear()
+    state.update(last_frame=None, text=[], refresh=0)
+
+
+def handle_event(event):
+    # True if the event was the HUD toggle
+    if event.type == pygame.KEYDOWN and event.key == TOGGLE_KEY:
+        toggle()
+        return True
+    return False
+
+
+def end_frame():
+    # Call once per frame, after the display update: closes the frame's timings
+    if not enabled:
+        return
+    now = time.perf_counter()
+    if state["last_frame"] is not None:
+        frame_times.append((now - state["last_frame"]) * 1000)
+        for name in current.keys() - stage_times.keys():
+            stage_times[name] = collections.deque(maxlen=HISTORY)
+        for name, times in stage_times.items():
+            times.append(current.get(name, 0.0))
+    state["last_frame"] = now
+    current.clear()
+
+
+def summary_lines(cache):
+    if not frame_times:
+        return ["collecting..."]
+    average = sum(frame_times) / len(frame_times)
+    lines = [
+        f"{1000 / average:5.1f} FPS  frame {average:5.2f} ms"
+        f"  max {max(frame_times):6.2f}"
+    ]
+    stages = [
+        (sum(times) / len(times), max(times), name)
+        for name, times in stage_times.items()
+    ]
+    for average, worst, name in sorted(stages, reverse=True):
+        lines.append(f"{name:<12} {average:6.2f} ms  max {worst:6.2f}")
+    lines.append(
+        f"text cache {cache['text_hit_rate']:4.0%} hits"
+        f"  {cache['texts']}/{cache['text_capacity']}"
+        f"  {cache['atlases']} atlases"
+    )
+    return lines
+
+
+def draw(surface, pos=(10, 10), target_fps=60):
+    # Draws the HUD if it is on; returns the rect it covered, or None. Frames
+    # over 1.5x the target frame time show up red
+    if not enabled:
+        return None
+    # Imported here: textCache imports this module for its probes
+    import textCache
+
+    with probe("hud"):
+        # Text changes every frame, so it is re-rendered only now and then
+        if state["refresh"] <= 0 or not state["text"]:
+            font = textCache.get_font(16, "monospace")
+            state["text"] = [
+                font.render(line, True, TEXT_COLOR)
+                for line in summary_lines(textCache.stats())
+            ]
+            state["refresh"] = TEXT_REFRESH
+        state["refresh"] -= 1
+
+        text_width = max(line.get_width() for line in state["text"])
+        text_height = sum(line.get_height() for line in state["text"])
+        graph_width = HISTORY * BAR_WIDTH
+        panel = pygame.Rect(
+            pos,
+            (
+                max(text_width, graph_width) + 2 * PADDING,
+                GRAPH_HEIGHT + text_height + 3 * PADDING,
+            ),
+        )
+        # Opaque, so drawing it again over itself (dirty-rect loops) is harmless
+        pygame.draw.rect(surface, PANEL_COLOR, panel)
+        pygame.draw.rect(surface, BORDER_COLOR, panel, 1)
+
+        # Frame-time graph, newest frame on the right
+        left = panel.x + PADDING
+        bottom = panel.y + PADDING + GRAPH_HEIGHT
+        target_ms = 1000 / target_fps
+        scale = GRAPH_HEIGHT / max(2 * target_ms, max(frame_times, default=0))
+        target_y = bottom - int(target_ms * scale)
+        pygame.draw.line(
+            surface, TARGET_COLOR, (left, target_y), (left + graph_width, target_y)
+        )
+        start = left + (HISTORY - len(frame_times)) * BAR_WIDTH
+        for i, ms in enumerate(frame_times):
+            color = SLOW_COLOR if ms > target_ms * 1.5 else GRAPH_COLOR
+            height = max(1, int(ms * scale))
+            pygame.draw.rect(
+                surface,
+                color,
+                (start + i * BAR_WIDTH, bottom - height, BAR_WIDTH, height),
+            )
+
+        y = bottom + PADDING
+        for line in state["text"]:
+            surface.blit(line, (left, y))
+            y += line.get_height()
+    return panel
@@ -0,0 +1,170 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import random
+import time
+
+from safeLogic import GameState
+
+# Headless bot benchmark for safeGame.py: a simulated player presses SPACE on a
+# virtual clock so whole games take microseconds instead of minutes.
+LETTER_SPEEDS = [0.2, 0.3, 0.4, 0.5, 0.7, 1.0]  # safeGame.py ships 0.5
+VISIBLE_LETTERS = [1, 3, 5, 7]  # ships 5
+GAME_TIMES = [15, 30, 45]  # ships 30
+GAMES_PER_SET = 20000
+CHUNK_GAMES = 2000  # Games per pool task
+
+# Bot model
+REACTION_MEAN = 0.25  # Seconds to notice a letter
+REACTION_SD = 0.05
+REACTION_MIN = 0.1
+TIMING_SD = 0.04  # Error when timing a press for a letter seen coming
+
+
+def plan_press(game, now, visible_letters, rng):
+    # Time of the bot's next press for the active box, on the virtual clock
+    scroller = game.active_scroller()
+    target = game.target_code[game.current_box]
+    interval = game.letter_speed
+    neighbors = visible_letters // 2
+
+    # Notice the window after a reaction time, with the scroller caught up
+    perceive = now + max(REACTION_MIN, rng.gauss(REACTION_MEAN, REACTION_SD))
+    if perceive >= game.attempt_deadline():
+        return perceive
+    game.update(perceive)
+    distance = scroller.distance_to(target)
+    next_tick = game.scheduler.next_tick
+
+    # Not in view yet: wait for it to scroll into the window, then react again
+    if distance > neighbors:
+        enters = next_tick + (distance - neighbors - 1) * interval
+        perceive = enters + max(REACTION_MIN, rng.gauss(REACTION_MEAN, REACTION_SD))
+        distance = neighbors
+        next_tick = enters + interval
+
+    # Aim for the middle of the tick the target sits in the center, but a press
+    # can never land before the bot has seen the letter
+    if distance == 0:
+        centered = next_tick - interval
+    else:
+        centered = next_tick + (distance - 1) * interval
+    aim = centered + interval / 2 + rng.gauss(0, TIMING_SD)
+    return max(perceive, aim)
+
+
+def play_games(letter_speed, visible_letters, game_time, games, seed):
+    # Plays whole games (up to three attempts each) and tallies the results
+    rng = random.Random(seed)
+    totals = {"games": 0, "wins": 0, "attempts": 0, "timeouts": 0, "win_ms": 0}
+    for _ in range(games):
+        now = 0.0
+        game = GameState(letter_speed, game_time, now, rng)
+        while not game.finished:
+            press_time = plan_press(game, now, visible_letters, rng)
+            deadline = game.attempt_deadline()
+            if press_time >= deadline:
+                now = deadline
+                _, result = game.update(now)
+            else:
+                now = press_time
+                game.update(now)
+                result = game.press(now)
+            if result:
+                totals["attempts"] += 1
+                totals["timeouts"] += result["outcome"] == "timeout"
+                if result["outcome"] == "win":
+                    totals["win_ms"] += result["total_ms"]
+        totals["games"] += 1
+        totals["wins"] += game.win
+    return (letter_speed, visible_letters, game_time), totals
+
+
+def run_sweep(letter_speeds, visible_letters, game_times, games, processes, seed):
+    params = list(itertools.product(letter_speeds, visible_letters, game_times))
+    tasks = []
+    for i, (speed, visible, game_time) in enumerate(params):
+        for start in range(0, games, CHUNK_GAMES):
+            count = min(CHUNK_GAMES, games - start)
+            tasks.append((speed, visible, game_time, count, f"{seed}-{i}-{start}"))
+
+    # Chunks of every parameter set are spread over the pool, then merged
+    results = {key: None for key in params}
+    with multiprocessing.Pool(processes) as pool:
+        for key, totals in pool.starmap(play_games, tasks, chunksize=1):
+            if results[key] is None:
+                results[key] = totals
+            else:
+                for name, value in totals.items():
+                    results[key][name] += value
+
+    rows = []
+    for (speed, visible, game_time), totals in results.items():
+        rows.append(
+            {
+                "letter_speed": speed,
+                "visible_letters": visible,
+                "game_time": game_time,
+                "games": totals["games"],
+                "win_rate": totals["wins"] / totals["games"],
+                "attempts_per_game": totals["attempts"] / totals["games"],
+                "timeout_rate": totals["timeouts"] / totals["attempts"],
+                "mean_win_ms": (
+                    totals["win_ms"] / totals["wins"] if totals["wins"] else None
+                ),
+            }
+        )
+    return rows
+
+
+def print_curves(rows, letter_speeds):
+    # One win-rate curve over LETTER_SPEED per (VISIBLE_LETTERS, GAME_TIME) pair
+    curves = {}
+    for row in rows:
+        key = (row["visible_letters"], row["game_time"])
+        curves.setdefault(key, {})[row["letter_speed"]] = row["win_rate"]
+    header = "visible  time | " + " ".join(f"{s:>6}" for s in letter_speeds)
+    print("Win rate by LETTER_SPEED")
+    print(header)
+    print("-" * len(header))
+    for (visible, game_time), curve in sorted(curves.items()):
+        values = " ".join(f"{curve[s]:6.1%}" for s in letter_speeds)
+        print(f"{visible:>7} {game_time:>5} | {values}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bot win rates for safeGame.py tuning")
+    parser.add_argument("--speeds", type=float, nargs="+", default=LETTER_SPEEDS)
+    parser.add_argument("--visible", type=int, nargs="+", default=VISIBLE_LETTERS)
+    parser.add_argument("--times", type=float, nargs="+", default=GAME_TIMES)
+    parser.add_argument("--games", type=int, default=GAMES_PER_SET)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this JSON file")
+    parser.add_argument("--csv", help="write results to this CSV file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = run_sweep(
+        args.speeds, args.visible, args.times, args.games, args.processes, args.seed
+    )
+    elapsed = time.perf_counter() - start
+
+    print_curves(rows, args.speeds)
+    games = sum(row["games"] for row in rows)
+    print(f"{games} games in {elapsed:.1f}s ({games / elapsed * 60:,.0f} per minute)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
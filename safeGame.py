@@ -3,6 +3,10 @@ import sys
 import random
 import time
 from pygame.locals import *
+from safeLogic import GameState
+from safeStats import StatsStore, new_session
+import profiler
+from textCache import GlyphAtlas, get_atlas, get_font, render_text
 
 # Initialize Pygame
 pygame.init()
@@ -22,100 +26,179 @@ SMALL_FONT_SIZE = 24
 LETTER_SPEED = 0.5  # Speed of scrolling letters (lower is faster)
 GAME_TIME = 30  # Time limit in seconds
 VISIBLE_LETTERS = 5  # Number of letters visible in the scrolling window
-
-# Set up the display
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("MATRIX-AESTHETICS: Safe Cracking")
+REDRAW_ON_CHANGE = True  # Repaint only changed regions and sleep between updates
+NOISE_GLYPHS = 20  # Background "0/1" glyphs
+SMOOTH_SCROLL = (
+    False  # Interpolate letters between ticks (repaints the scroller every frame)
+)
 
 # Fonts
-font = pygame.font.Font(None, FONT_SIZE)
-small_font = pygame.font.Font(None, SMALL_FONT_SIZE)
+font = get_font(FONT_SIZE)
+small_font = get_font(SMALL_FONT_SIZE)
 
 
 class ScrollingLetters:
-    def __init__(self, x, y, width, height):
+    def __init__(self, x, y, width, height, scroller):
+        # Draws a safeLogic.Scroller, which owns the letter order and position
         self.x = x
         self.y = y
         self.width = width
         self.height = height
-        self.letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
-        self.letter_list = list(self.letters)
-        random.shuffle(self.letter_list)
-        self.position = 0
-        self.last_update = time.time()
+        self.scroller = scroller
+        self.letter_list = scroller.letter_list
         self.letter_height = font.get_height()
 
-    def update(self):
-        current_time = time.time()
-        if current_time - self.last_update > LETTER_SPEED:
-            self.position += 1
-            if self.position >= len(self.letter_list):
-                self.position = 0
-            self.last_update = current_time
+        # Shuffled alphabet padded with wrapped letters so any offset is one slice
+        self.padding = VISIBLE_LETTERS // 2 + 1
+        padded = "".join(
+            self.letter_list[-self.padding :]
+            + self.letter_list
+            + self.letter_list[: self.padding]
+        )
+        self.row_height = round(self.letter_height * 0.8)
+        # The strips follow this scroller's shuffled order, so they are built
+        # here rather than kept in the shared atlas cache, which would gain two
+        # atlases nobody else can use with every new game
+        self.neighbor_strip = GlyphAtlas(
+            padded, small_font, [DARK_GREEN], self.row_height
+        )
+        self.center_strip = GlyphAtlas(padded, font, [GREEN], self.letter_height)
 
-    def draw(self, surface):
+    def draw(self, surface, offset=0.0):
         # Draw a small window for the scrolling letters
         pygame.draw.rect(surface, DARK_GREEN, (self.x, self.y, self.width, self.height))
         pygame.draw.rect(surface, GREEN, (self.x, self.y, self.width, self.height), 2)
 
-        # Draw the current letter in the center
-        center_index = self.position
-        current_letter = self.letter_list[center_index]
-        text = font.render(current_letter, True, GREEN)
-        text_rect = text.get_rect(
-            center=(self.x + self.width // 2, self.y + self.height // 2)
+        # Fractional offsets scroll smoothly between letters
+        row = self.scroller.position + self.padding + offset
+        center_x = self.x + self.width // 2
+        center_y = self.y + self.height // 2
+        neighbors = VISIBLE_LETTERS // 2
+
+        # Letters above and below, each a single slice of the neighbor strip
+        strip = self.neighbor_strip
+        left = center_x - strip.width // 2
+        span = neighbors * strip.row_height
+        above_top = int((row - neighbors) * strip.row_height)
+        surface.blit(
+            strip.surface,
+            (left, center_y - strip.row_height // 2 - span),
+            (0, above_top, strip.width, span),
+        )
+        below_top = int((row + 1) * strip.row_height)
+        surface.blit(
+            strip.surface,
+            (left, center_y + (strip.row_height + 1) // 2),
+            (0, below_top, strip.width, span),
         )
-        surface.blit(text, text_rect)
-
-        # Draw letters above and below
-        for i in range(1, VISIBLE_LETTERS // 2 + 1):
-            # Letters above
-            above_index = (center_index - i) % len(self.letter_list)
-            above_letter = self.letter_list[above_index]
-            above_text = small_font.render(above_letter, True, DARK_GREEN)
-            above_rect = above_text.get_rect(
-                center=(
-                    self.x + self.width // 2,
-                    self.y + self.height // 2 - i * (self.letter_height * 0.8),
-                )
-            )
-            surface.blit(above_text, above_rect)
-
-            # Letters below
-            below_index = (center_index + i) % len(self.letter_list)
-            below_letter = self.letter_list[below_index]
-            below_text = small_font.render(below_letter, True, DARK_GREEN)
-            below_rect = below_text.get_rect(
-                center=(
-                    self.x + self.width // 2,
-                    self.y + self.height // 2 + i * (self.letter_height * 0.8),
-                )
-            )
-            surface.blit(below_text, below_rect)
-
-    def get_current_letter(self):
-        return self.letter_list[self.position]
-
-
-def generate_code():
-    return "".join(random.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", k=3))
 
+        # Draw the current letter in the center
+        strip = self.center_strip
+        surface.blit(
+            strip.surface,
+            (center_x - strip.width // 2, center_y - strip.row_height // 2),
+            (0, int(row * strip.row_height), strip.width, strip.row_height),
+        )
 
-def main():
-    clock = pygame.time.Clock()
+    def get_rect(self):
+        # Area covered by the window and the neighbor letters drawn around it
+        reach = (VISIBLE_LETTERS // 2) * self.letter_height * 0.8 + self.letter_height
+        center_y = self.y + self.height // 2
+        top = min(self.y, int(center_y - reach))
+        bottom = max(self.y + self.height, int(center_y + reach))
+        return pygame.Rect(self.x, top, self.width, bottom - top)
+
+
+def generate_noise():
+    # Matrix-style background glyphs as (strip, destination, area) blits
+    strip = get_atlas("01", small_font, [DARK_GREEN])
+    noise = []
+    for i in range(NOISE_GLYPHS):
+        area = strip.area(random.choice("01"))
+        rect = pygame.Rect(
+            random.randint(0, WIDTH), random.randint(0, HEIGHT), area.width, area.height
+        )
+        noise.append((strip.surface, rect, area))
+    return noise
+
+
+def draw_foreground(box_positions, game, best_ms=None):
+    # Everything that only changes with the game state, on a transparent layer
+    layer = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+
+    # Draw boxes
+    for i, (x, y) in enumerate(box_positions):
+        color = GREEN if game.box_states[i] else WHITE
+        pygame.draw.rect(layer, color, (x, y, BOX_WIDTH, BOX_HEIGHT), 2)
+
+        # Draw selected letter if any
+        if game.selected_letters[i]:
+            text = render_text(font, game.selected_letters[i], GREEN)
+            text_rect = text.get_rect(center=(x + BOX_WIDTH // 2, y + BOX_HEIGHT // 2))
+            layer.blit(text, text_rect)
+
+        # Draw indicator for current box
+        if i == game.current_box and not game.finished and not game.box_states[i]:
+            indicator_text = render_text(small_font, "ACTIVE", GREEN)
+            layer.blit(
+                indicator_text,
+                (
+                    x + BOX_WIDTH // 2 - indicator_text.get_width() // 2,
+                    y + BOX_HEIGHT + 10,
+                ),
+            )
 
-    # Game variables
-    target_code = generate_code()
-    attempts_left = 3
-    current_box = 0
-    selected_letters = ["", "", ""]
-    box_states = [
-        False,
-        False,
-        False,
-    ]  # False = not selected, True = correctly selected
-
-    # Calculate box positions
+    # Draw target code
+    code_text = render_text(font, f"TARGET: {game.target_code}", GREEN)
+    layer.blit(code_text, (WIDTH // 2 - code_text.get_width() // 2, 50))
+
+    # Draw attempts
+    attempts_text = render_text(font, f"ATTEMPTS: {game.attempts_left}", GREEN)
+    layer.blit(attempts_text, (50, 20))
+
+    # Draw game over or win message
+    if game.game_over:
+        message = render_text(font, "ACCESS DENIED - PRESS R TO RETRY", RED)
+        layer.blit(message, (WIDTH // 2 - message.get_width() // 2, HEIGHT - 100))
+
+    if game.win:
+        message = render_text(font, "ACCESS GRANTED - PRESS R TO PLAY AGAIN", GREEN)
+        layer.blit(message, (WIDTH // 2 - message.get_width() // 2, HEIGHT - 100))
+
+    # Fastest recorded win, shown once the round is over
+    if game.finished and best_ms is not None:
+        best_text = render_text(small_font, f"BEST TIME: {best_ms / 1000:.2f}s", GREEN)
+        layer.blit(best_text, (WIDTH // 2 - best_text.get_width() // 2, HEIGHT - 140))
+
+    # Instructions
+    instructions = render_text(small_font, "Press SPACE to select a letter", WHITE)
+    layer.blit(instructions, (WIDTH // 2 - instructions.get_width() // 2, HEIGHT - 50))
+    return layer
+
+
+def render_timer(seconds):
+    # Timer text and where it goes, right-aligned in the top corner
+    timer_text = render_text(font, f"TIME: {seconds}", GREEN)
+    return timer_text, timer_text.get_rect(topright=(WIDTH - 50, 20))
+
+
+def draw_frame(
+    surface, rect, noise, scroller, offset, foreground, timer_text, timer_rect
+):
+    # Repaint one region of the screen: background noise, the active scroller
+    # (if any), the static foreground layer and the timer
+    surface.set_clip(rect)
+    surface.fill(BLACK)
+    surface.blits(noise, doreturn=False)
+    if scroller:
+        scroller.draw(surface, offset)
+    surface.blit(foreground, rect, rect)
+    surface.blit(timer_text, timer_rect)
+    surface.set_clip(None)
+
+
+def build_layout(game):
+    # Box positions, and a scrolling letter display above each box
     total_width = 3 * BOX_WIDTH + 2 * BOX_SPACING
     start_x = (WIDTH - total_width) // 2
     box_positions = [
@@ -123,8 +206,6 @@ def main():
         (start_x + BOX_WIDTH + BOX_SPACING, HEIGHT // 2 - BOX_HEIGHT // 2),
         (start_x + 2 * (BOX_WIDTH + BOX_SPACING), HEIGHT // 2 - BOX_HEIGHT // 2),
     ]
-
-    # Create scrolling letter displays
     scroll_height = font.get_height() * 3
     scrolling_letters = [
         ScrollingLetters(
@@ -132,155 +213,160 @@ def main():
             box_pos[1] - scroll_height - 20,
             50,
             scroll_height,
+            scroller,
         )
-        for box_pos in box_positions
+        for box_pos, scroller in zip(box_positions, game.scrollers)
     ]
+    return box_positions, scrolling_letters
+
+
+def main():
+    # Returns on QUIT or ESC, leaving pygame running for the launcher
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("MATRIX-AESTHETICS: Safe Cracking")
+    clock = pygame.time.Clock()
 
-    game_start_time = time.time()
-    game_over = False
-    win = False
+    # Game rules live in safeLogic; this loop feeds them time and key presses
+    game = GameState(LETTER_SPEED, GAME_TIME, time.perf_counter())
+    box_positions, scrolling_letters = build_layout(game)
+
+    # Every attempt goes to the local stats database
+    stats = StatsStore()
+    session = new_session()
+    best_ms = stats.best_time()
+
+    # Redraw state: only dirty rects are repainted when REDRAW_ON_CHANGE is set
+    dirty = []
+    last_state = None
+    foreground = None
+    noise = []
+    last_timer_value = None
+    timer_text = None
+    timer_rect = pygame.Rect(WIDTH - 50, 20, 0, 0)
 
     # Main game loop
     while True:
-        current_time = time.time()
-        elapsed_time = current_time - game_start_time
-        time_left = max(0, GAME_TIME - elapsed_time)
-
-        # Check if time is up
-        if time_left <= 0 and not game_over:
-            attempts_left -= 1
-            if attempts_left <= 0:
-                game_over = True
-            else:
-                # Reset for next attempt
-                target_code = generate_code()
-                current_box = 0
-                selected_letters = ["", "", ""]
-                box_states = [False, False, False]
-                game_start_time = time.time()
+        current_time = time.perf_counter()
+        with profiler.probe("update"):
+            ticks, result = game.update(current_time)
+        results = [result]
 
         # Event handling
         for event in pygame.event.get():
+            # Showing or hiding the HUD needs a full repaint
+            if profiler.handle_event(event):
+                dirty.append(screen.get_rect())
+                continue
             if event.type == QUIT:
-                pygame.quit()
-                sys.exit()
+                stats.close()
+                return
 
             if event.type == KEYDOWN:
                 if event.key == K_ESCAPE:
-                    pygame.quit()
-                    sys.exit()
-
-                if event.key == K_SPACE and not game_over and not win:
-                    if not box_states[current_box]:
-                        selected_letters[current_box] = scrolling_letters[
-                            current_box
-                        ].get_current_letter()
-                        box_states[current_box] = (
-                            selected_letters[current_box] == target_code[current_box]
-                        )
-
-                        current_box += 1
-
-                        # Check if all boxes are filled
-                        if current_box >= 3:
-                            if all(box_states):
-                                win = True
-                            else:
-                                attempts_left -= 1
-                                if attempts_left <= 0:
-                                    game_over = True
-                                else:
-                                    # Reset for next attempt
-                                    target_code = generate_code()
-                                    current_box = 0
-                                    selected_letters = ["", "", ""]
-                                    box_states = [False, False, False]
-                                    game_start_time = time.time()
+                    stats.close()
+                    return
+
+                if event.key == K_SPACE:
+                    results.append(game.press(time.perf_counter()))
 
                 # Restart game if game over or win
-                if (game_over or win) and event.key == K_r:
-                    target_code = generate_code()
-                    attempts_left = 3
-                    current_box = 0
-                    selected_letters = ["", "", ""]
-                    box_states = [False, False, False]
-                    game_start_time = time.time()
-                    game_over = False
-                    win = False
-
-        # Update scrolling letters
-        for i, scroller in enumerate(scrolling_letters):
-            if i == current_box and not box_states[i] and not game_over and not win:
-                scroller.update()
+                if game.finished and event.key == K_r:
+                    game.reset(time.perf_counter())
+                    session = new_session()
+
+        for result in results:
+            if result is None:
+                continue
+            stats.record_attempt(session, **result)
+            if result["outcome"] == "win":
+                if best_ms is None or result["total_ms"] < best_ms:
+                    best_ms = result["total_ms"]
+
+        time_left = game.time_left(current_time)
+
+        # Active scroller, already advanced by the game update
+        active_scroller = None
+        if game.active_scroller():
+            active_scroller = scrolling_letters[game.current_box]
+            if ticks or SMOOTH_SCROLL:
+                dirty.append(active_scroller.get_rect())
+
+        # Rebuild the static layer only when the game state changes
+        state = (
+            game.target_code,
+            game.attempts_left,
+            game.current_box,
+            tuple(game.selected_letters),
+            tuple(game.box_states),
+            game.game_over,
+            game.win,
+            best_ms,
+        )
+        if state != last_state:
+            last_state = state
+            with profiler.probe("foreground"):
+                foreground = draw_foreground(box_positions, game, best_ms)
+            dirty.append(screen.get_rect())
+
+        # Timer digits
+        timer_value = int(time_left)
+        if timer_value != last_timer_value:
+            last_timer_value = timer_value
+            dirty.append(timer_rect)
+            timer_text, timer_rect = render_timer(timer_value)
+            dirty.append(timer_rect)
+
+        # Background glyph noise, every frame or once per letter tick
+        if not REDRAW_ON_CHANGE or ticks or not noise:
+            dirty.extend(rect for _, rect, _ in noise)
+            noise = generate_noise()
+            dirty.extend(rect for _, rect, _ in noise)
 
         # Drawing
-        screen.fill(BLACK)
-
-        # Draw matrix-style background effect
-        for i in range(20):
-            x = random.randint(0, WIDTH)
-            y = random.randint(0, HEIGHT)
-            text = small_font.render(random.choice("01"), True, DARK_GREEN)
-            screen.blit(text, (x, y))
-
-        # Draw scrolling letter displays
-        for i, scroller in enumerate(scrolling_letters):
-            if i == current_box and not box_states[i] and not game_over and not win:
-                scroller.draw(screen)
-
-        # Draw boxes
-        for i, (x, y) in enumerate(box_positions):
-            color = GREEN if box_states[i] else WHITE
-            pygame.draw.rect(screen, color, (x, y, BOX_WIDTH, BOX_HEIGHT), 2)
-
-            # Draw selected letter if any
-            if selected_letters[i]:
-                text = font.render(selected_letters[i], True, GREEN)
-                text_rect = text.get_rect(
-                    center=(x + BOX_WIDTH // 2, y + BOX_HEIGHT // 2)
+        if not REDRAW_ON_CHANGE:
+            dirty = [screen.get_rect()]
+        with profiler.probe("draw"):
+            offset = game.scheduler.alpha if SMOOTH_SCROLL else 0.0
+            for rect in dirty:
+                draw_frame(
+                    screen,
+                    rect,
+                    noise,
+                    active_scroller,
+                    offset,
+                    foreground,
+                    timer_text,
+                    timer_rect,
                 )
-                screen.blit(text, text_rect)
-
-            # Draw indicator for current box
-            if i == current_box and not box_states[i] and not game_over and not win:
-                indicator_text = small_font.render("ACTIVE", True, GREEN)
-                screen.blit(
-                    indicator_text,
-                    (
-                        x + BOX_WIDTH // 2 - indicator_text.get_width() // 2,
-                        y + BOX_HEIGHT + 10,
-                    ),
-                )
-
-        # Draw target code
-        code_text = font.render(f"TARGET: {target_code}", True, GREEN)
-        screen.blit(code_text, (WIDTH // 2 - code_text.get_width() // 2, 50))
-
-        # Draw attempts and timer
-        attempts_text = font.render(f"ATTEMPTS: {attempts_left}", True, GREEN)
-        screen.blit(attempts_text, (50, 20))
-
-        timer_text = font.render(f"TIME: {int(time_left)}", True, GREEN)
-        screen.blit(timer_text, (WIDTH - timer_text.get_width() - 50, 20))
-
-        # Draw game over or win message
-        if game_over:
-            message = font.render("ACCESS DENIED - PRESS R TO RETRY", True, RED)
-            screen.blit(message, (WIDTH // 2 - message.get_width() // 2, HEIGHT - 100))
-
-        if win:
-            message = font.render("ACCESS GRANTED - PRESS R TO PLAY AGAIN", True, GREEN)
-            screen.blit(message, (WIDTH // 2 - message.get_width() // 2, HEIGHT - 100))
-
-        # Instructions
-        instructions = small_font.render("Press SPACE to select a letter", True, WHITE)
-        screen.blit(
-            instructions, (WIDTH // 2 - instructions.get_width() // 2, HEIGHT - 50)
-        )
-
-        pygame.display.flip()
-        clock.tick(30)
+        hud_rect = profiler.draw(screen, target_fps=30)
+        if hud_rect:
+            dirty.append(hud_rect)
+
+        if REDRAW_ON_CHANGE:
+            with profiler.probe("flip"):
+                if dirty:
+                    pygame.display.update(dirty)
+            profiler.end_frame()
+            dirty = []
+
+            # Sleep until the next scroll tick, timer digit or input
+            wake_time = current_time + game.scheduler.time_to_next_tick(current_time)
+            if time_left > 0:
+                wake_time = min(wake_time, current_time + time_left % 1 + 0.001)
+            if SMOOTH_SCROLL and active_scroller or profiler.enabled:
+                wake_time = min(wake_time, current_time + 1 / 30)
+            timeout = max(1, int((wake_time - time.perf_counter()) * 1000))
+            event = pygame.event.wait(timeout)
+            if event.type != NOEVENT:
+                pygame.event.post(event)
+        else:
+            with profiler.probe("flip"):
+                pygame.display.flip()
+            profiler.end_frame()
+            clock.tick(30)
 
 
 if __name__ == "__main__":
     main()
+    pygame.quit()
+    sys.exit()
@@ -0,0 +1,147 @@
+import random
+
+# Safe-cracking rules without pygame, stepped by explicit timestamps so the
+# game can run on the real clock and the bots in safeBench.py on a virtual one
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+BOXES = 3
+ATTEMPTS = 3
+
+
+class TickScheduler:
+    def __init__(self, interval, now):
+        # Fixed timestep on whatever clock the caller passes in
+        self.interval = interval
+        self.next_tick = now + interval
+        self.alpha = 0.0
+
+    def advance(self, now):
+        # Whole ticks elapsed since the last call; slow frames never drop ticks
+        ticks = 0
+        if now >= self.next_tick:
+            ticks = int((now - self.next_tick) // self.interval) + 1
+            self.next_tick += ticks * self.interval
+
+        # Fraction of the way to the next tick, for interpolated drawing
+        self.alpha = min(1.0, max(0.0, 1 - (self.next_tick - now) / self.interval))
+        return ticks
+
+    def time_to_next_tick(self, now):
+        return max(0.0, self.next_tick - now)
+
+
+class Scroller:
+    def __init__(self, rng):
+        self.letter_list = list(LETTERS)
+        rng.shuffle(self.letter_list)
+        self.position = 0
+
+    def advance(self, ticks):
+        self.position = (self.position + ticks) % len(self.letter_list)
+
+    def get_current_letter(self):
+        return self.letter_list[self.position]
+
+    def distance_to(self, letter):
+        # Ticks until letter reaches the center (0 if it is there now)
+        return (self.letter_list.index(letter) - self.position) % len(self.letter_list)
+
+
+def generate_code(rng=random):
+    return "".join(rng.choices(LETTERS, k=BOXES))
+
+
+class GameState:
+    def __init__(self, letter_speed, game_time, now, rng=None):
+        self.letter_speed = letter_speed
+        self.game_time = game_time
+        self.rng = rng or random.Random()
+        self.scrollers = [Scroller(self.rng) for _ in range(BOXES)]
+        self.scheduler = TickScheduler(letter_speed, now)
+        self.reset(now)
+
+    def reset(self, now):
+        # Fresh game: full attempts, new code
+        self.attempts_left = ATTEMPTS
+        self.game_over = False
+        self.win = False
+        self.new_attempt(now)
+
+    def new_attempt(self, now):
+        self.target_code = generate_code(self.rng)
+        self.current_box = 0
+        self.selected_letters = [""] * BOXES
+        self.box_states = [False] * BOXES  # True = correctly selected
+        self.attempt_start = now
+        self.box_start = now
+        self.reactions = []
+
+    @property
+    def finished(self):
+        return self.game_over or self.win
+
+    def active_scroller(self):
+        if self.finished or self.box_states[self.current_box]:
+            return None
+        return self.scrollers[self.current_box]
+
+    def time_left(self, now):
+        return max(0, self.game_time - (now - self.attempt_start))
+
+    def attempt_deadline(self):
+        return self.attempt_start + self.game_time
+
+    def end_attempt(self, now, outcome, total_ms):
+        # Record for the finished attempt, then move on to the next one
+        result = {
+            "target_code": self.target_code,
+            "chosen": list(self.selected_letters),
+            "reactions": self.reactions,
+            "outcome": outcome,
+            "total_ms": total_ms,
+        }
+        if outcome == "win":
+            self.win = True
+        else:
+            self.attempts_left -= 1
+            if self.attempts_left <= 0:
+                self.game_over = True
+            else:
+                self.new_attempt(now)
+        return result
+
+    def update(self, now):
+        # Returns (ticks, finished attempt record or None)
+        ticks = self.scheduler.advance(now)
+
+        # Check if time is up
+        result = None
+        if not self.finished and now >= self.attempt_deadline():
+            result = self.end_attempt(now, "timeout", self.game_time * 1000)
+
+        scroller = self.active_scroller()
+        if scroller:
+            scroller.advance(ticks)
+        return ticks, result
+
+    def press(self, now):
+        # Lock in the letter under the active box; returns a finished attempt or None
+        scroller = self.active_scroller()
+        if scroller is None:
+            return None
+        box = self.current_box
+        letter = scroller.get_current_letter()
+        self.selected_letters[box] = letter
+        self.box_states[box] = letter == self.target_code[box]
+
+        # Reaction time runs from the box becoming active
+        self.reactions.append((letter, round((now - self.box_start) * 1000)))
+        self.box_start = now
+        self.current_box += 1
+
+        # Check if all boxes are filled
+        if self.current_box < BOXES:
+            return None
+        total_ms = sum(ms for _, ms in self.reactions)
+        return self.end_attempt(
+            now, "win" if all(self.box_states) else "wrong", total_ms
+        )
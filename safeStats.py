@@ -0,0 +1,192 @@
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+# Local attempt history for safeGame.py
+DB_PATH = "safeGame_stats.db"
+FLUSH_INTERVAL = 1.0  # Seconds a queued attempt may wait before it is written
+FLUSH_BATCH = 256  # Attempts written per transaction at most
+HISTOGRAM_BIN_MS = 100
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    played_at REAL NOT NULL,
+    target_code TEXT NOT NULL,
+    chosen TEXT NOT NULL,
+    outcome TEXT NOT NULL CHECK (outcome IN ('win', 'wrong', 'timeout')),
+    total_ms INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reactions (
+    attempt_id INTEGER NOT NULL REFERENCES attempts (id),
+    box INTEGER NOT NULL,
+    letter TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    reaction_ms INTEGER NOT NULL,
+    PRIMARY KEY (attempt_id, box)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS attempts_leaderboard ON attempts (outcome, total_ms);
+CREATE INDEX IF NOT EXISTS attempts_session ON attempts (session);
+CREATE INDEX IF NOT EXISTS reactions_time ON reactions (reaction_ms);
+CREATE VIEW IF NOT EXISTS reaction_histogram AS
+    SELECT reaction_ms / {HISTOGRAM_BIN_MS} * {HISTOGRAM_BIN_MS} AS bin_ms,
+           COUNT(*) AS presses,
+           SUM(correct) AS hits
+    FROM reactions
+    GROUP BY bin_ms
+    ORDER BY bin_ms;
+"""
+
+
+def connect(path):
+    connection = sqlite3.connect(path, timeout=5)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+def new_session():
+    # One session per game, spanning its attempts until restart
+    return uuid.uuid4().hex
+
+
+class StatsStore:
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.pending = queue.Queue()
+
+        # Schema is created up front so readers never see a missing table
+        connection = connect(path)
+        with connection:
+            connection.executescript(SCHEMA)
+        connection.close()
+
+        self.reader = None
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+
+    def record_attempt(
+        self, session, target_code, chosen, reactions, outcome, total_ms
+    ):
+        # reactions: one (letter, reaction_ms) pair per box that was pressed
+        self.pending.put(
+            {
+                "session": session,
+                "played_at": time.time(),
+                "target_code": target_code,
+                "chosen": "".join(chosen),
+                "reactions": list(reactions),
+                "outcome": outcome,
+                "total_ms": int(total_ms),
+            }
+        )
+
+    def write_loop(self):
+        # IDs come from SQLite inside each transaction, so several stores (a
+        # second process, the launcher next to a standalone game) can share a file
+        connection = connect(self.path)
+        running = True
+        while running:
+            # Block for the first attempt, then gather more until the deadline
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while batch[-1] is not None and len(batch) < FLUSH_BATCH:
+                try:
+                    batch.append(self.pending.get(timeout=deadline - time.monotonic()))
+                except (queue.Empty, ValueError):
+                    break
+            if batch[-1] is None:
+                batch.pop()
+                running = False
+            if not batch:
+                continue
+
+            # A failed batch is reported and dropped; the writer keeps going so
+            # the queue never backs up behind it
+            try:
+                with connection:
+                    for attempt in batch:
+                        attempt_id = connection.execute(
+                            "INSERT INTO attempts (session, played_at, target_code, "
+                            "chosen, outcome, total_ms) VALUES (?, ?, ?, ?, ?, ?)",
+                            (
+                                attempt["session"],
+                                attempt["played_at"],
+                                attempt["target_code"],
+                                attempt["chosen"],
+                                attempt["outcome"],
+                                attempt["total_ms"],
+                            ),
+                        ).lastrowid
+                        connection.executemany(
+                            "INSERT INTO reactions VALUES (?, ?, ?, ?, ?)",
+                            [
+                                (
+                                    attempt_id,
+                                    box,
+                                    letter,
+                                    int(letter == attempt["target_code"][box]),
+                                    ms,
+                                )
+                                for box, (letter, ms) in enumerate(attempt["reactions"])
+                            ],
+                        )
+            except sqlite3.Error as error:
+                print(
+                    f"safeStats: dropped {len(batch)} attempt(s): {error}",
+                    file=sys.stderr,
+                )
+        connection.close()
+
+    def read_connection(self):
+        # WAL lets this read alongside the writer thread without blocking it
+        if self.reader is None:
+            self.reader = connect(self.path)
+        return self.reader
+
+    def leaderboard(self, limit=10):
+        # Fastest wins, served straight from the (outcome, total_ms) index
+        return (
+            self.read_connection()
+            .execute(
+                "SELECT total_ms, target_code, played_at FROM attempts "
+                "WHERE outcome = 'win' ORDER BY total_ms LIMIT ?",
+                (limit,),
+            )
+            .fetchall()
+        )
+
+    def best_time(self):
+        best = self.leaderboard(1)
+        return best[0][0] if best else None
+
+    def reaction_histogram(self):
+        return (
+            self.read_connection()
+            .execute("SELECT bin_ms, presses, hits FROM reaction_histogram")
+            .fetchall()
+        )
+
+    def close(self):
+        # Flush whatever is still queued before the game exits
+        self.pending.put(None)
+        self.writer.join()
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+
+if __name__ == "__main__":
+    stats = StatsStore()
+    print("Fastest wins:")
+    for rank, (total_ms, target_code, played_at) in enumerate(stats.leaderboard(), 1):
+        played = time.strftime("%Y-%m-%d %H:%M", time.localtime(played_at))
+        print(f"{rank:>3}. {total_ms / 1000:6.2f}s  {target_code}  {played}")
+    print("Reaction times:")
+    for bin_ms, presses, hits in stats.reaction_histogram():
+        print(f"{bin_ms:>6}ms {presses:>8} presses {hits / presses:6.1%} correct")
+    stats.close()
@@ -0,0 +1,189 @@
+import collections
+import json
+import os
+import sys
+import pygame
+import pygame.sysfont
+import profiler
+
+# Shared text rendering for every visualizer: interned fonts, a bounded LRU of
+# rendered strings and packed glyph atlases for per-character effects.
+# Cached surfaces are shared between callers, so never draw onto them.
+TEXT_CACHE_SIZE = 512  # Rendered strings kept before the least recent is dropped
+SYSFONT_CACHE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".sysfont_cache.json"
+)  # Persisted system font table; delete it after installing new fonts
+
+fonts = {}
+text_cache = collections.OrderedDict()
+atlases = {}
+counters = collections.Counter()
+sysfonts_ready = False
+
+
+def load_sysfonts(path=SYSFONT_CACHE):
+    # Seed pygame's system font table from disk instead of scanning the font
+    # directories (fc-list on Linux, the registry on Windows). Returns False if
+    # the cache is missing, empty, from another platform or names a font file
+    # that is gone, or if this pygame has no is_init flag to mark the table loaded
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if data.get("platform") != sys.platform or not data.get("fonts"):
+        return False
+    if not hasattr(pygame.sysfont, "is_init"):
+        return False
+    table = {}
+    for group in ("fonts", "aliases"):
+        table[group] = {
+            name: {(bold, italic): file for bold, italic, file in styles}
+            for name, styles in data.get(group, {}).items()
+        }
+    files = {file for styles in table["fonts"].values() for file in styles.values()}
+    if not all(os.path.exists(file) for file in files):
+        return False
+    pygame.sysfont.Sysfonts.update(table["fonts"])
+    pygame.sysfont.Sysalias.update(table["aliases"])
+    pygame.sysfont.is_init = True
+    counters["sysfont_loads"] += 1
+    return True
+
+
+def save_sysfonts(path=SYSFONT_CACHE):
+    # Scan (if pygame hasn't yet) and write the table for the next start
+    pygame.sysfont.initsysfonts()
+    data = {"platform": sys.platform}
+    for group, table in (
+        ("fonts", pygame.sysfont.Sysfonts),
+        ("aliases", pygame.sysfont.Sysalias),
+    ):
+        data[group] = {
+            name: [[bold, italic, file] for (bold, italic), file in styles.items()]
+            for name, styles in table.items()
+        }
+    try:
+        with open(path, "w") as f:
+            json.dump(data, f)
+    except OSError:
+        pass  # Read-only checkout: scan again next time
+
+
+def init_sysfonts():
+    # Every SysFont call needs the table; load it once, or scan and save it
+    global sysfonts_ready
+    if sysfonts_ready or getattr(pygame.sysfont, "is_init", False):
+        return
+    sysfonts_ready = True
+    if not load_sysfonts():
+        counters["sysfont_scans"] += 1
+        save_sysfonts()
+
+
+def get_font(size, name=None, path=None):
+    # One Font per (path, name, size); a missing font file falls back to SysFont
+    key = (path, name, size)
+    if key in fonts:
+        counters["font_hits"] += 1
+        return fonts[key]
+    counters["font_misses"] += 1
+    font = None
+    if path:
+        try:
+            font = pygame.font.Font(path, size)
+        except OSError:
+            pass
+    if font is None:
+        init_sysfonts()
+        font = pygame.font.SysFont(name, size)
+    fonts[key] = font
+    return fonts[key]
+
+
+def render_text(font, text, color, antialias=True):
+    # For strings drawn again and again; text that changes every frame should
+    # call font.render directly instead of churning the cache
+    key = (font, text, tuple(color), antialias)
+    surface = text_cache.get(key)
+    if surface is not None:
+        counters["text_hits"] += 1
+        text_cache.move_to_end(key)
+        return surface
+    counters["text_misses"] += 1
+    with profiler.probe("text"):
+        surface = font.render(text, antialias, color)
+    text_cache[key] = surface
+    if len(text_cache) > TEXT_CACHE_SIZE:
+        text_cache.popitem(last=False)
+        counters["text_evictions"] += 1
+    return surface
+
+
+class GlyphAtlas:
+    def __init__(self, chars, font, colors, row_height):
+        # One surface: a column per color, a row per character, each glyph
+        # centered in its cell
+        self.chars = chars
+        self.row_height = row_height
+        glyphs = [
+            [font.render(char, True, color) for char in chars] for color in colors
+        ]
+        self.width = max(glyph.get_width() for column in glyphs for glyph in column)
+        self.surface = pygame.Surface(
+            (self.width * len(colors), row_height * len(chars)), pygame.SRCALPHA
+        )
+        for column, column_glyphs in enumerate(glyphs):
+            for row, glyph in enumerate(column_glyphs):
+                center = (
+                    int((column + 0.5) * self.width),
+                    int((row + 0.5) * row_height),
+                )
+                self.surface.blit(glyph, glyph.get_rect(center=center))
+        self.rows = {char: i for i, char in enumerate(chars)}
+
+    def area(self, char, color_index=0):
+        return pygame.Rect(
+            color_index * self.width,
+            self.rows[char] * self.row_height,
+            self.width,
+            self.row_height,
+        )
+
+
+def get_atlas(chars, font, colors, row_height=None):
+    # Atlases are shared by everything drawing the same glyphs in the same colors
+    colors = tuple(tuple(color) for color in colors)
+    key = (chars, font, colors, row_height)
+    if key not in atlases:
+        with profiler.probe("text"):
+            atlases[key] = GlyphAtlas(
+                chars, font, colors, row_height or font.get_height()
+            )
+    return atlases[key]
+
+
+def stats():
+    # Cache sizes and hit/miss counts, shown by the profiler HUD and saved by
+    # the benchmark
+    lookups = counters["text_hits"] + counters["text_misses"]
+    return {
+        "fonts": len(fonts),
+        "font_hits": counters["font_hits"],
+        "font_misses": counters["font_misses"],
+        "sysfont_loads": counters["sysfont_loads"],
+        "sysfont_scans": counters["sysfont_scans"],
+        "texts": len(text_cache),
+        "text_capacity": TEXT_CACHE_SIZE,
+        "text_hits": counters["text_hits"],
+        "text_misses": counters["text_misses"],
+        "text_evictions": counters["text_evictions"],
+        "text_hit_rate": counters["text_hits"] / lookups if lookups else 0.0,
+        "atlases": len(atlases),
+        "atlas_bytes": sum(
+            atlas.surface.get_bytesize()
+            * atlas.surface.get_width()
+            * atlas.surface.get_height()
+            for atlas in atlases.values()
+        ),
+    }